@@ -0,0 +1,72 @@
+"""
+Benchmark: NumPy mesh backend vs OpenSCAD compile for the supported shapes.
+
+Usage:
+    python bench_mesh.py [repetitions]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from parser import DescriptionParser
+from generator import OpenSCADGenerator
+from mesh import MeshBuilder
+
+
+DESCRIPTIONS = [
+    "Uma caixa de 10x5x3 cm com tampa simples",
+    "Um organizador com três divisórias retangulares",
+    "Um copo simples de 8 cm",
+    "Uma bandeja robusta com 5 compartimentos",
+    "Um porta-lápis cilíndrico minimalista",
+]
+
+
+def time_call(func, repetitions: int) -> float:
+    """Average wall time in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        func()
+    return (time.perf_counter() - start) / repetitions * 1000
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    parser = DescriptionParser()
+    mesh = MeshBuilder()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = OpenSCADGenerator(output_dir=tmp, backend="openscad")
+        try:
+            openscad = generator.openscad()
+            print(f"OpenSCAD: {openscad.path} ({openscad.version})")
+        except RuntimeError as e:
+            openscad = None
+            print(f"{e}\nComparing mesh backend only.")
+
+        print(f"\n{'description':<50} {'mesh ms':>9} {'tris':>6} {'openscad ms':>12} {'speedup':>8}")
+        for description in DESCRIPTIONS:
+            spec = parser.parse(description)
+            if not mesh.supports(spec):
+                print(f"{description:<50} {'unsupported':>9}")
+                continue
+
+            stl_path = Path(tmp) / "mesh.stl"
+            mesh_ms = time_call(lambda: mesh.generate(spec, stl_path), repetitions)
+            triangles = len(mesh.build(spec))
+
+            if openscad is None:
+                print(f"{description:<50} {mesh_ms:>9.2f} {triangles:>6}")
+                continue
+
+            scad_path = Path(tmp) / "model.scad"
+            scad_path.write_text(generator._generate_scad_code(spec))
+            # One compile is enough to show the order of magnitude
+            openscad_ms = time_call(lambda: generator._compile_to_stl(scad_path, Path(tmp) / "openscad.stl"), 1)
+            print(f"{description:<50} {mesh_ms:>9.2f} {triangles:>6} {openscad_ms:>12.1f} {openscad_ms / mesh_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Micro-benchmark: DescriptionParser with the single-pass keyword matcher vs the
+original per-keyword substring loops, on the example prompts and a synthetic
+corpus.
+
+Usage:
+    python bench_parser.py [corpus_size]
+"""
+
+import random
+import sys
+import time
+
+from parser import DescriptionParser, ObjectSpec
+
+
+EXAMPLES = [
+    "Uma caixa de 10x5x3 cm com tampa simples",
+    "Um suporte minimalista para celular inclinado a 30 graus",
+    "Um organizador com três divisórias retangulares",
+    "Um gancho robusto para pendurar mochila",
+    "Um porta-lápis cilíndrico, vibe futurista",
+]
+
+FILLER = (
+    "para mesa de escritório com acabamento bonito pequeno grande pra guardar "
+    "coisas objetos do dia a dia na parede da cozinha quarto sala please make it"
+).split()
+
+
+class LegacyDescriptionParser(DescriptionParser):
+    """Original parse(): nested keyword loops, dimension regexes run twice (reference)."""
+
+    def parse(self, description: str) -> ObjectSpec:
+        spec = ObjectSpec(raw_description=description)
+        desc_lower = description.lower()
+
+        spec.object_type = "box"
+        for obj_type, keywords in self.OBJECT_TYPES.items():
+            if any(keyword in desc_lower for keyword in keywords):
+                spec.object_type = obj_type
+                break
+
+        dim_match = self.dim_pattern.search(description)
+        matches = None if dim_match else self.single_dim_pattern.findall(description)
+        single_match = self.single_dim_pattern.search(description) if matches else None
+        self._extract_dimensions(dim_match, single_match, spec)
+
+        spec.style = "default"
+        for style, keywords in self.STYLES.items():
+            if any(keyword in desc_lower for keyword in keywords):
+                spec.style = style
+                break
+
+        for attr, keywords in self.FUNCTIONAL_ATTRS.items():
+            for keyword in keywords:
+                if keyword in desc_lower:
+                    setattr(spec, attr, True)
+                    break
+
+        angle = None
+        match = self.angle_pattern.search(description)
+        if match:
+            angle = float(match.group(1).replace(',', '.'))
+        else:
+            for word, value in self.ANGLE_WORDS.items():
+                if word in description.lower():
+                    angle = value
+                    break
+        if angle is not None:
+            spec.angle = angle
+
+        divider_count = 0
+        match = self.count_pattern.search(description.lower())
+        if match:
+            count_str = match.group(1)
+            divider_count = int(count_str) if count_str.isdigit() else self.number_words.get(count_str, 0)
+        elif "divisória" in description.lower() or "compartimento" in description.lower():
+            divider_count = next(
+                (num for word, num in self.number_words.items() if word in description.lower()), 2
+            )
+        if divider_count > 0:
+            spec.has_dividers = True
+            spec.divider_count = divider_count
+
+        self._apply_style_modifications(spec)
+
+        has_dims = self.dim_pattern.search(description) or self.single_dim_pattern.search(description)
+        self._apply_type_defaults(spec, bool(has_dims))
+        return spec
+
+
+def synthetic_corpus(parser: DescriptionParser, size: int):
+    """Random prompts mixing keywords from every table with filler words."""
+    vocabulary = [
+        kw for table in (parser.OBJECT_TYPES, parser.STYLES, parser.FUNCTIONAL_ATTRS)
+        for kws in table.values() for kw in kws
+    ]
+    extras = ["10x5x3 cm", "80 mm", "45 graus", "inclinado", "duas divisórias", "3 compartimentos"]
+    corpus = []
+    for _ in range(size):
+        words = random.sample(FILLER, random.randint(3, 12))
+        words += random.sample(vocabulary, random.randint(1, 4))
+        if random.random() < 0.5:
+            words.append(random.choice(extras))
+        random.shuffle(words)
+        corpus.append(" ".join(words).capitalize())
+    return corpus
+
+
+def time_parse(parser: DescriptionParser, prompts, repetitions: int) -> float:
+    """Average microseconds per prompt."""
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for prompt in prompts:
+            parser.parse(prompt)
+    return (time.perf_counter() - start) / (repetitions * len(prompts)) * 1e6
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    random.seed(7)
+
+    parser = DescriptionParser()
+    legacy = LegacyDescriptionParser()
+    corpus = synthetic_corpus(parser, size)
+
+    # Same specs as the original implementation
+    for prompt in EXAMPLES + corpus:
+        assert parser.parse(prompt).to_dict() == legacy.parse(prompt).to_dict(), prompt
+
+    print(f"{'corpus':<22} {'original (µs)':>14} {'matcher (µs)':>13} {'speedup':>8}")
+    for name, prompts, repetitions in (("examples", EXAMPLES, 2000), (f"synthetic ({size})", corpus, 1)):
+        before = time_parse(legacy, prompts, repetitions)
+        after = time_parse(parser, prompts, repetitions)
+        print(f"{name:<22} {before:>14.1f} {after:>13.1f} {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Compact artifact transfer: precompressed variants, content negotiation and
+HTTP range requests for downloads.
+"""
+
+import gzip
+import os
+import re
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+
+# Content-Encoding -> file suffix, in server preference order
+ENCODINGS: Dict[str, str] = {"gzip": ".gz"}
+if brotli is not None:
+    ENCODINGS = {"br": ".br", **ENCODINGS}
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Artifacts are content-addressed, so a name never changes content
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+CHUNK_SIZE = 64 * 1024
+
+
+def variant_suffixes(suffix: str) -> Tuple[str, ...]:
+    """File suffixes of the compressed variants of a `suffix` file."""
+    return tuple(suffix + encoded for encoded in ENCODINGS.values())
+
+
+def write_encoded_variants(path: Path, target: Optional[Path] = None) -> List[Path]:
+    """
+    Write a compressed sibling (e.g. model.stl.gz) for each supported
+    encoding, named after `target` when the file is about to be renamed.
+    """
+    data = path.read_bytes()
+    target = target or path
+    written = []
+    for encoding, suffix in ENCODINGS.items():
+        if encoding == "br":
+            encoded = brotli.compress(data, quality=5)
+        else:
+            encoded = gzip.compress(data, compresslevel=6, mtime=0)
+        variant = target.with_name(target.name + suffix)
+        variant.write_bytes(encoded)
+        written.append(variant)
+    return written
+
+
+def _accepted_encodings(header: str) -> List[str]:
+    """Encodings from Accept-Encoding with a non-zero q value."""
+    accepted = []
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                weight = float(q[2:] or 0)
+            except ValueError:
+                # Malformed q value: treat the encoding as not acceptable
+                weight = 0
+            if weight == 0:
+                continue
+        if name:
+            accepted.append(name.strip().lower())
+    return accepted
+
+
+def _etags(header: str) -> List[str]:
+    """Entity tags listed in If-None-Match (weak validators compared as strong)."""
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def _read_chunks(f: BinaryIO) -> Iterator[bytes]:
+    """Stream an already opened file and close it at the end."""
+    with f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+def _parse_range(header: str) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    Single `bytes=first-last` range -> (first, last), either may be None.
+    None when the header is invalid or unsupported (other units, several
+    ranges, last < first): such a Range header is ignored (RFC 9110 14.2).
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    first, last = (int(group) if group else None for group in match.groups())
+    if first is not None and last is not None and last < first:
+        return None
+    return first, last
+
+
+def _satisfiable_range(byte_range: Tuple[Optional[int], Optional[int]], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) within `size`; None if unsatisfiable (416)."""
+    first, last = byte_range
+    if first is not None:
+        start = first
+        end = min(last, size - 1) if last is not None else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - last, 0)
+        end = size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def file_response(
+    request: Request,
+    path: Path,
+    filename: str,
+    media_type: str,
+    etag: Optional[str] = None,
+) -> Response:
+    """
+    Serve `path` with range support, or a precompressed variant when the
+    client accepts it. Ranges always apply to the identity encoding; an
+    ignored Range header gets the full (possibly compressed) representation.
+
+    The file is opened before returning, so a concurrent eviction either
+    raises FileNotFoundError here or leaves the open file readable.
+    """
+    headers = {"Accept-Ranges": "bytes", "Vary": "Accept-Encoding", "Cache-Control": IMMUTABLE}
+    range_header = request.headers.get("range")
+    byte_range = _parse_range(range_header) if range_header else None
+
+    encoding = None
+    if byte_range is None:
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        for candidate, suffix in ENCODINGS.items():
+            variant = path.with_name(path.name + suffix)
+            if candidate in accepted and os.path.exists(variant):
+                encoding, path = candidate, variant
+                break
+
+    if etag:
+        # Each encoding is a different representation, so it gets its own strong ETag
+        if encoding:
+            etag = f"{etag}-{ENCODINGS[encoding].lstrip('.')}"
+        headers["ETag"] = f'"{etag}"'
+        if headers["ETag"] in _etags(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+
+    if byte_range is not None:
+        size = path.stat().st_size
+        satisfiable = _satisfiable_range(byte_range, size)
+        if satisfiable is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = satisfiable
+        with open(path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return Response(content=body, status_code=206, media_type=media_type, headers=headers)
+
+    f = open(path, "rb")
+    headers["Content-Length"] = str(os.fstat(f.fileno()).st_size)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(_read_chunks(f), media_type=media_type, headers=headers)
@@ -3,448 +3,265 @@ Generator module for creating 3D models from ObjectSpec using OpenSCAD.
 """
 
 import os
+import re
+import shutil
 import subprocess
 import tempfile
-import uuid
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Any, List, Tuple
 from string import Template
 
 from parser import ObjectSpec
+from stl_cache import STLCache, content_key
 
+from downloads import write_encoded_variants, variant_suffixes
 
-class OpenSCADGenerator:
-    """Generates STL files from ObjectSpec using OpenSCAD templates."""
-    
-    def __init__(self, templates_dir: Optional[str] = None, output_dir: Optional[str] = None):
-        self.base_dir = Path(__file__).parent
-        self.templates_dir = Path(templates_dir) if templates_dir else self.base_dir / "templates"
-        self.output_dir = Path(output_dir) if output_dir else self.base_dir.parent / "output"
-        
-        # Create output directory if it doesn't exist
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-    
-    def generate(self, spec: ObjectSpec) -> str:
-        """
-        Generate STL file from ObjectSpec.
-        Returns the path to the generated STL file.
-        """
-        # Generate unique filename
-        file_id = str(uuid.uuid4())[:8]
-        scad_path = self.output_dir / f"{spec.object_type}_{file_id}.scad"
-        stl_path = self.output_dir / f"{spec.object_type}_{file_id}.stl"
-        
-        # Generate OpenSCAD code
-        scad_code = self._generate_scad_code(spec)
-        
-        # Write SCAD file
-        with open(scad_path, 'w') as f:
-            f.write(scad_code)
-        
-        # Compile to STL
-        self._compile_to_stl(scad_path, stl_path)
-        
-        return str(stl_path)
-    
-    def _generate_scad_code(self, spec: ObjectSpec) -> str:
-        """Generate OpenSCAD code based on object type and spec."""
-        generators = {
-            "box": self._generate_box,
-            "support": self._generate_support,
-            "cylinder": self._generate_cylinder,
-            "tray": self._generate_tray,
-            "hook": self._generate_hook,
-        }
-        
-        generator = generators.get(spec.object_type, self._generate_box)
-        return generator(spec)
-    
-    def _generate_box(self, spec: ObjectSpec) -> str:
-        """Generate OpenSCAD code for a box."""
-        code = f"""// Generated Box - {spec.style} style
-// Dimensions: {spec.width}x{spec.depth}x{spec.height} mm
+try:
+    from mesh import MeshBuilder, ensure_binary_stl
+except ImportError:  # NumPy not installed: OpenSCAD only, ASCII STL
+    MeshBuilder = None
+    ensure_binary_stl = None
 
-$fn = 32;
 
-// Parameters
-width = {spec.width};
-depth = {spec.depth};
-height = {spec.height};
-wall = {spec.wall_thickness};
-has_lid = {"true" if spec.has_lid else "false"};
+@dataclass(frozen=True)
+class QualityTier:
+    """How a quality tier scales the templates' tessellation."""
+    fn_scale: float  # multiplier of the template's base $fn
+    min_fn: int
+    max_rounding_fn: int  # cap for spheres inside minkowski()/organic bases
 
-// Main box
-module box() {{
-    difference() {{
-        // Outer shell
-        cube([width, depth, height]);
-        
-        // Inner cavity
-        translate([wall, wall, wall])
-            cube([width - 2*wall, depth - 2*wall, height]);
-    }}
-}}
 
-// Lid module
-module lid() {{
-    lid_height = wall * 2;
-    lip = wall * 0.8;
-    
-    translate([0, 0, height + 2]) {{
-        // Lid top
-        cube([width, depth, wall]);
-        
-        // Lip that fits inside
-        translate([wall + 0.2, wall + 0.2, -lip])
-            cube([width - 2*wall - 0.4, depth - 2*wall - 0.4, lip]);
-    }}
-}}
+@dataclass(frozen=True)
+class Tessellation:
+    fn: int
+    rounding_fn: int
 
-// Render
-box();
-if (has_lid) lid();
-"""
-        return code
-    
-    def _generate_support(self, spec: ObjectSpec) -> str:
-        """Generate OpenSCAD code for a phone/tablet support (L-shape)."""
-        code = f"""// Generated Support - {spec.style} style
-// Angle: {spec.angle} degrees
 
-$fn = 48;
+# Base $fn of each template (the "print" tier)
+BASE_FN = {"box": 32, "support": 48, "cylinder": 64, "tray": 32, "hook": 48}
 
-// Parameters
-width = {spec.width};
-depth = {spec.depth};
-height = {spec.height};
-wall = {spec.wall_thickness * 2};
-angle = {spec.angle};
-lip_height = 15;
+QUALITY_TIERS = {
+    "draft": QualityTier(fn_scale=0.25, min_fn=8, max_rounding_fn=6),
+    "preview": QualityTier(fn_scale=0.5, min_fn=12, max_rounding_fn=12),
+    "print": QualityTier(fn_scale=1.0, min_fn=12, max_rounding_fn=64),
+}
 
-// L-shaped support
-module support() {{
-    // Base
-    cube([width, depth, wall]);
-    
-    // Back support (angled)
-    translate([0, depth - wall, 0])
-        rotate([90 - angle, 0, 0])
-            cube([width, height, wall]);
-    
-    // Front lip to hold device
-    translate([0, wall, 0])
-        cube([width, wall, lip_height]);
-    
-    // Side supports for stability
-    hull() {{
-        cube([wall, depth, wall]);
-        translate([0, depth - wall, 0])
-            rotate([90 - angle, 0, 0])
-                cube([wall, height * 0.3, wall]);
-    }}
-    
-    translate([width - wall, 0, 0])
-    hull() {{
-        cube([wall, depth, wall]);
-        translate([0, depth - wall, 0])
-            rotate([90 - angle, 0, 0])
-                cube([wall, height * 0.3, wall]);
-    }}
-}}
 
-// Apply style modifications
-module styled_support() {{
-    if ("{spec.style}" == "minimalist") {{
-        // Thinner, cleaner lines
-        scale([1, 1, 0.8]) support();
-    }} else if ("{spec.style}" == "robust") {{
-        // Thicker, more solid
-        support();
-        // Add reinforcement
-        translate([width/4, depth/2, 0])
-            cylinder(h=wall, r=wall);
-        translate([3*width/4, depth/2, 0])
-            cylinder(h=wall, r=wall);
-    }} else {{
-        support();
-    }}
-}}
+@dataclass(frozen=True)
+class ScadArtifact:
+    """Generated OpenSCAD source of a spec at a quality tier, and where it is cached."""
+    code: str
+    backend: str
+    key: str  # content hash of backend + code
+    stem: str  # file stem of the cached STL/SCAD files
 
-styled_support();
-"""
-        return code
-    
-    def _generate_cylinder(self, spec: ObjectSpec) -> str:
-        """Generate OpenSCAD code for a cylindrical container."""
-        diameter = spec.width
-        
-        code = f"""// Generated Cylinder/Cup - {spec.style} style
-// Diameter: {diameter} mm, Height: {spec.height} mm
 
-$fn = 64;
+# One template per object type in templates_dir (string.Template syntax, $$ = literal $)
+TEMPLATE_NAMES = ("box", "support", "cylinder", "tray", "hook")
 
-// Parameters
-diameter = {diameter};
-height = {spec.height};
-wall = {spec.wall_thickness};
 
-// Base cylinder
-module cylinder_cup() {{
-    difference() {{
-        // Outer cylinder
-        cylinder(h=height, d=diameter);
-        
-        // Inner cavity
-        translate([0, 0, wall])
-            cylinder(h=height, d=diameter - 2*wall);
-    }}
-}}
+class CompiledTemplate:
+    """
+    A string.Template parsed once into literal chunks and placeholder slots;
+    rendering fills the slots and joins, with no regex pass per call.
+    """
+    
+    def __init__(self, template: Template):
+        self._parts: List[Optional[str]] = []
+        self._slots: List[Tuple[int, str]] = []
+        source = template.template
+        position = 0
+        for match in template.pattern.finditer(source):
+            self._parts.append(source[position:match.start()])
+            if match.group("escaped") is not None:
+                self._parts.append(template.delimiter)
+            elif match.group("invalid") is not None:
+                raise ValueError(f"Invalid placeholder in template at offset {match.start()}")
+            else:
+                self._slots.append((len(self._parts), match.group("named") or match.group("braced")))
+                self._parts.append(None)
+            position = match.end()
+        self._parts.append(source[position:])
+    
+    def render(self, values: Dict[str, Any]) -> str:
+        """Same result as Template.substitute(values)."""
+        parts = self._parts[:]
+        for index, name in self._slots:
+            parts[index] = str(values[name])
+        return "".join(parts)
 
-// Futuristic style with ridges
-module futuristic_cylinder() {{
-    difference() {{
-        union() {{
-            cylinder_cup();
-            
-            // Add decorative ridges
-            for (i = [0:5]) {{
-                translate([0, 0, height * 0.2 + i * height * 0.12])
-                    difference() {{
-                        cylinder(h=2, d=diameter + 2);
-                        cylinder(h=3, d=diameter - 1);
-                    }}
-            }}
-        }}
-        
-        // Inner cavity (ensure it's hollow)
-        translate([0, 0, wall])
-            cylinder(h=height + 10, d=diameter - 2*wall);
-    }}
-}}
 
-// Organic style with curved base
-module organic_cylinder() {{
-    difference() {{
-        union() {{
-            // Curved base
-            scale([1, 1, 0.3])
-                sphere(d=diameter);
-            
-            translate([0, 0, diameter * 0.1])
-                cylinder_cup();
-        }}
-        
-        // Inner cavity
-        translate([0, 0, wall])
-            cylinder(h=height + diameter, d=diameter - 2*wall);
-    }}
-}}
-
-// Render based on style
-if ("{spec.style}" == "futuristic") {{
-    futuristic_cylinder();
-}} else if ("{spec.style}" == "organic") {{
-    organic_cylinder();
-}} else {{
-    cylinder_cup();
-}}
-"""
-        return code
+class OpenSCADGenerator:
+    """Generates STL files from ObjectSpec using OpenSCAD templates."""
     
-    def _generate_tray(self, spec: ObjectSpec) -> str:
-        """Generate OpenSCAD code for a tray with optional dividers."""
-        divider_count = spec.divider_count if spec.has_dividers else 0
+    def __init__(
+        self,
+        templates_dir: Optional[str] = None,
+        output_dir: Optional[str] = None,
+        cache_max_bytes: int = 500 * 1024 * 1024,
+        backend: str = "auto",
+        cache_ttl: Optional[float] = 7 * 24 * 3600,
+        max_artifacts: int = 256,
+    ):
+        self.base_dir = Path(__file__).parent
+        self.templates_dir = Path(templates_dir) if templates_dir else self.base_dir / "templates"
+        self.output_dir = Path(output_dir) if output_dir else self.base_dir.parent / "output"
         
-        code = f"""// Generated Tray/Organizer - {spec.style} style
-// Dimensions: {spec.width}x{spec.depth}x{spec.height} mm
-// Dividers: {divider_count}
-
-$fn = 32;
-
-// Parameters
-width = {spec.width};
-depth = {spec.depth};
-height = {spec.height};
-wall = {spec.wall_thickness};
-divider_count = {divider_count};
-
-// Base tray
-module tray() {{
-    difference() {{
-        // Outer shell
-        cube([width, depth, height]);
+        # Create output directory if it doesn't exist
+        self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        // Inner cavity
-        translate([wall, wall, wall])
-            cube([width - 2*wall, depth - 2*wall, height]);
-    }}
-}}
-
-// Dividers
-module dividers() {{
-    if (divider_count > 0) {{
-        compartment_width = (width - wall) / (divider_count + 1);
+        # SCAD templates, read and compiled once
+        self.templates: Dict[str, CompiledTemplate] = {
+            name: CompiledTemplate(Template((self.templates_dir / f"{name}.scad").read_text(encoding="utf-8")))
+            for name in TEMPLATE_NAMES
+        }
         
-        for (i = [1:divider_count]) {{
-            translate([i * compartment_width, wall, wall])
-                cube([wall, depth - 2*wall, height - wall]);
-        }}
-    }}
-}}
-
-// Rounded tray for organic style
-module organic_tray() {{
-    minkowski() {{
-        difference() {{
-            cube([width - 4, depth - 4, height - 2]);
-            translate([wall, wall, wall])
-                cube([width - 2*wall - 4, depth - 2*wall - 4, height]);
-        }}
-        sphere(r=2);
-    }}
-}}
-
-// Render
-if ("{spec.style}" == "organic") {{
-    organic_tray();
-    translate([2, 2, 1]) dividers();
-}} else {{
-    tray();
-    dividers();
-}}
-"""
-        return code
+        # Recently generated SCAD code by spec hash, shared by every stage
+        # of a request (preview, compile, needs_compile checks)
+        self.max_artifacts = max_artifacts
+        self._artifacts: "OrderedDict[tuple, ScadArtifact]" = OrderedDict()
+        self._artifacts_lock = threading.Lock()
+        self.artifact_hits = 0
+        self.artifact_misses = 0
+        
+        # "auto": NumPy mesh backend for supported shapes, OpenSCAD otherwise
+        if backend not in ("auto", "openscad"):
+            raise ValueError(f"Unknown backend: {backend}")
+        self.mesh = MeshBuilder() if backend == "auto" and MeshBuilder is not None else None
+        
+        # OpenSCAD executable, resolved on first use
+        self._openscad: Optional[OpenSCADBinary] = None
+        self._openscad_lock = threading.Lock()
+        
+        # Compiled artifacts are content-addressed by their SCAD code;
+        # each STL is stored with precompressed variants for downloads
+        self.cache = STLCache(
+            self.output_dir,
+            max_bytes=cache_max_bytes,
+            suffixes=(".stl", *variant_suffixes(".stl"), ".scad"),
+            ttl=cache_ttl,
+        )
     
-    def _generate_hook(self, spec: ObjectSpec) -> str:
-        """Generate OpenSCAD code for a wall hook."""
-        code = f"""// Generated Hook - {spec.style} style
-// Size: {spec.width}x{spec.depth}x{spec.height} mm
-
-$fn = 48;
-
-// Parameters
-width = {spec.width};
-hook_depth = {spec.depth};
-height = {spec.height};
-thickness = {spec.wall_thickness * 3};
-
-// Mounting plate dimensions
-plate_width = width * 1.5;
-plate_height = height * 0.5;
-
-// Basic hook profile
-module hook_profile() {{
-    // Mounting section (straight up)
-    square([thickness, plate_height]);
+    def backend_for(self, spec: ObjectSpec) -> str:
+        """Which backend builds `spec`: "mesh" or "openscad"."""
+        if self.mesh is not None and self.mesh.supports(spec):
+            return "mesh"
+        return "openscad"
     
-    // Curve outward
-    translate([0, plate_height])
-        difference() {{
-            square([hook_depth, hook_depth]);
-            translate([hook_depth, 0])
-                circle(r=hook_depth - thickness);
-        }}
+    def tessellation(self, spec: ObjectSpec, quality: str = "print") -> Tessellation:
+        """Tessellation parameters of a quality tier for this object type."""
+        tier = QUALITY_TIERS.get(quality)
+        if tier is None:
+            raise ValueError(f"Unknown quality: {quality}")
+        base_fn = BASE_FN.get(spec.object_type, BASE_FN["box"])
+        fn = max(tier.min_fn, round(base_fn * tier.fn_scale))
+        return Tessellation(fn=fn, rounding_fn=min(fn, tier.max_rounding_fn))
     
-    // Hook tip (curved up)
-    translate([hook_depth - thickness, plate_height])
-        square([thickness, hook_depth * 0.3]);
-}}
-
-// Main hook
-module hook() {{
-    // Mounting plate with holes
-    difference() {{
-        translate([-plate_width/2 + thickness/2, 0, 0])
-            cube([plate_width, thickness/2, plate_height]);
+    def artifact(self, spec: ObjectSpec, quality: str = "print") -> ScadArtifact:
+        """
+        SCAD code, backend, cache key and file stem for a spec at a quality tier.
+        
+        Memoized by spec hash (every field but the raw description), so the
+        code is rendered once however many stages of a request need it.
+        """
+        spec_hash = (quality, *spec.to_dict().values())
+        with self._artifacts_lock:
+            artifact = self._artifacts.get(spec_hash)
+            if artifact is not None:
+                self._artifacts.move_to_end(spec_hash)
+                self.artifact_hits += 1
+                return artifact
+            self.artifact_misses += 1
         
-        // Screw holes
-        translate([-plate_width/4 + thickness/2, -1, plate_height * 0.3])
-            rotate([-90, 0, 0])
-                cylinder(h=thickness, d=4);
-        translate([plate_width/4 + thickness/2, -1, plate_height * 0.3])
-            rotate([-90, 0, 0])
-                cylinder(h=thickness, d=4);
-    }}
+        scad_code = self._generate_scad_code(spec, quality)
+        backend = self.backend_for(spec)
+        # Backends produce different files for the same code
+        key = content_key(f"{backend}\n{scad_code}")
+        artifact = ScadArtifact(code=scad_code, backend=backend, key=key, stem=f"{spec.object_type}_{key}")
+        
+        with self._artifacts_lock:
+            self._artifacts[spec_hash] = artifact
+            while len(self._artifacts) > self.max_artifacts:
+                self._artifacts.popitem(last=False)
+        return artifact
     
-    // Hook arm
-    linear_extrude(width)
-        hook_profile();
-}}
-
-// Robust version with reinforcement
-module robust_hook() {{
-    hook();
+    def artifact_stats(self) -> Dict[str, Any]:
+        with self._artifacts_lock:
+            return {
+                "entries": len(self._artifacts),
+                "max_entries": self.max_artifacts,
+                "hits": self.artifact_hits,
+                "misses": self.artifact_misses,
+            }
     
-    // Side reinforcement
-    translate([0, thickness/2, 0])
-        rotate([90, 0, 0])
-            linear_extrude(thickness/2)
-                polygon([[0, 0], [hook_depth * 0.7, 0], [0, width]]);
+    def needs_compile(self, spec: ObjectSpec, quality: str = "print") -> bool:
+        """Whether generating this tier means a (slow) OpenSCAD compile."""
+        artifact = self.artifact(spec, quality)
+        return artifact.backend == "openscad" and not self.cache.contains(artifact.key)
     
-    translate([0, thickness/2, width])
-        rotate([90, 0, 0])
-            linear_extrude(thickness/2)
-                polygon([[0, 0], [hook_depth * 0.7, 0], [0, -width]]);
-}}
-
-// Minimalist version
-module minimalist_hook() {{
-    // Simpler mounting
-    translate([-width/2 + thickness/2, 0, 0])
-        cube([width, thickness/2, plate_height * 0.5]);
+    def generate(self, spec: ObjectSpec, quality: str = "print") -> str:
+        """
+        Generate STL file from ObjectSpec.
+        Returns the path to the generated STL file.
+        
+        Identical SCAD code maps to the same file, so repeated requests
+        return the existing STL without recompiling. Every quality tier
+        is a separate entry of the same cache.
+        """
+        artifact = self.artifact(spec, quality)
+        tess = self.tessellation(spec, quality)
+        
+        def build(stl_path: Path):
+            # The SCAD file served by /download-scad is the artifact's code
+            scad_path = self.cache.path_for(artifact.stem, ".scad")
+            with open(scad_path, 'w') as f:
+                f.write(artifact.code)
+            if artifact.backend == "mesh":
+                self.mesh.generate(spec, stl_path, segments=tess.fn)
+            else:
+                self._compile_to_stl(scad_path, stl_path)
+            write_encoded_variants(stl_path, target=self.cache.path_for(artifact.stem, ".stl"))
+        
+        return str(self.cache.get_or_build(artifact.key, artifact.stem, build))
     
-    // Clean hook
-    scale([0.8, 0.8, 1])
-        linear_extrude(width)
-            hook_profile();
-}}
-
-// Render based on style
-if ("{spec.style}" == "robust") {{
-    robust_hook();
-}} else if ("{spec.style}" == "minimalist") {{
-    minimalist_hook();
-}} else {{
-    hook();
-}}
-"""
-        return code
+    def _generate_scad_code(self, spec: ObjectSpec, quality: str = "print") -> str:
+        """Render the OpenSCAD template of the object type for a spec and quality tier."""
+        template = self.templates.get(spec.object_type, self.templates["box"])
+        return template.render(self._template_values(spec, self.tessellation(spec, quality)))
+    
+    @staticmethod
+    def _template_values(spec: ObjectSpec, tess: Tessellation) -> Dict[str, Any]:
+        """Placeholder values shared by all templates (each uses a subset)."""
+        return {
+            "style": spec.style,
+            "width": spec.width,
+            "depth": spec.depth,
+            "height": spec.height,
+            "wall": spec.wall_thickness,
+            "has_lid": "true" if spec.has_lid else "false",
+            "angle": spec.angle,
+            "fn": tess.fn,
+            "rounding_fn": tess.rounding_fn,
+            "diameter": spec.width,
+            "divider_count": spec.divider_count if spec.has_dividers else 0,
+            # Supports and hooks are thicker than containers
+            "support_wall": spec.wall_thickness * 2,
+            "hook_thickness": spec.wall_thickness * 3,
+        }
     
     def _compile_to_stl(self, scad_path: Path, stl_path: Path) -> None:
         """Compile OpenSCAD file to STL."""
-        # Try common OpenSCAD paths
-        openscad_paths = [
-            "openscad",  # If in PATH
-            "/opt/homebrew/bin/openscad",  # macOS Homebrew (Apple Silicon)
-            "/usr/local/bin/openscad",  # macOS Homebrew (Intel)
-            "/Applications/OpenSCAD.app/Contents/MacOS/OpenSCAD",  # macOS App
-            "/usr/bin/openscad",  # Linux
-            "C:\\Program Files\\OpenSCAD\\openscad.exe",  # Windows
-        ]
-        
-        openscad_cmd = None
-        for path in openscad_paths:
-            try:
-                result = subprocess.run(
-                    [path, "--version"],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if result.returncode == 0:
-                    openscad_cmd = path
-                    break
-            except (subprocess.SubprocessError, FileNotFoundError):
-                continue
-        
-        if openscad_cmd is None:
-            raise RuntimeError(
-                "OpenSCAD not found. Please install OpenSCAD from https://openscad.org/downloads.html"
-            )
+        openscad = self.openscad()
         
-        # Run OpenSCAD to generate STL
+        # Run OpenSCAD to generate (binary, when supported) STL
+        command = [openscad.path, "-o", str(stl_path)]
+        if openscad.supports_binstl:
+            command += ["--export-format", "binstl"]
         result = subprocess.run(
-            [openscad_cmd, "-o", str(stl_path), str(scad_path)],
+            command + [str(scad_path)],
             capture_output=True,
             text=True,
             timeout=120
@@ -455,6 +272,98 @@ if ("{spec.style}" == "robust") {{
         
         if not stl_path.exists():
             raise RuntimeError("STL file was not generated")
+        
+        # Older OpenSCAD releases only export ASCII STL
+        if ensure_binary_stl is not None:
+            ensure_binary_stl(stl_path)
+    
+    def openscad(self, refresh: bool = False) -> "OpenSCADBinary":
+        """
+        The validated OpenSCAD executable, resolved once and memoized.
+        Raises RuntimeError (also memoized) when it is not available; with
+        `refresh`, a failed lookup is retried (e.g. OpenSCAD installed later).
+        """
+        with self._openscad_lock:
+            if self._openscad is None or (refresh and self._openscad.error):
+                self._openscad = resolve_openscad()
+            binary = self._openscad
+        if binary.error:
+            raise RuntimeError(binary.error)
+        return binary
+    
+    def openscad_status(self) -> Dict[str, Any]:
+        """OpenSCAD availability for health checks (retries a failed lookup)."""
+        try:
+            self.openscad(refresh=True)
+        except RuntimeError:
+            pass
+        return self._openscad.to_dict()
+
+
+@dataclass
+class OpenSCADBinary:
+    """Result of locating the OpenSCAD executable."""
+    path: Optional[str] = None
+    version: Optional[str] = None
+    error: Optional[str] = None
+    
+    @property
+    def supports_binstl(self) -> bool:
+        """`--export-format binstl` is available since OpenSCAD 2021.01."""
+        match = re.search(r'(\d{4})\.\d+', self.version or "")
+        return bool(match) and int(match.group(1)) >= 2021
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "available": self.error is None,
+            "path": self.path,
+            "version": self.version,
+            "error": self.error,
+        }
+
+
+# Common install locations not always on PATH
+OPENSCAD_CANDIDATES = [
+    "/opt/homebrew/bin/openscad",  # macOS Homebrew (Apple Silicon)
+    "/usr/local/bin/openscad",  # macOS Homebrew (Intel)
+    "/Applications/OpenSCAD.app/Contents/MacOS/OpenSCAD",  # macOS App
+    "/usr/bin/openscad",  # Linux
+    "C:\\Program Files\\OpenSCAD\\openscad.exe",  # Windows
+]
+
+
+def resolve_openscad() -> OpenSCADBinary:
+    """
+    Locate and validate the OpenSCAD executable.
+    
+    Order: the OPENSCAD_PATH environment variable (used exclusively if set),
+    then `openscad` on PATH, then common install locations. Only the chosen
+    candidate is run (`--version`), once.
+    """
+    override = os.environ.get("OPENSCAD_PATH")
+    if override:
+        candidates = [shutil.which(override) or override]
+    else:
+        candidates = [shutil.which("openscad")] + OPENSCAD_CANDIDATES
+    
+    path = next((c for c in candidates if c and os.path.isfile(c) and os.access(c, os.X_OK)), None)
+    if path is None:
+        where = f"OPENSCAD_PATH={override}" if override else "PATH or common install locations"
+        return OpenSCADBinary(
+            error=f"OpenSCAD not found ({where}). "
+                  "Please install OpenSCAD from https://openscad.org/downloads.html"
+        )
+    
+    try:
+        result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10)
+    except (subprocess.SubprocessError, OSError) as e:
+        return OpenSCADBinary(path=path, error=f"OpenSCAD not found: {path} failed to run ({e})")
+    if result.returncode != 0:
+        return OpenSCADBinary(path=path, error=f"OpenSCAD not found: {path} --version exited with {result.returncode}")
+    
+    # OpenSCAD prints its version to stderr
+    version = (result.stderr or result.stdout).strip().splitlines()
+    return OpenSCADBinary(path=path, version=version[0] if version else None)
 
 
 # Example usage
@@ -0,0 +1,194 @@
+"""
+Asynchronous job queue for model generation.
+
+Jobs are queued in a bounded asyncio queue and executed by a fixed number of
+workers, each driving one blocking call (an OpenSCAD compile) in a thread
+pool, so the event loop stays free for other requests. Blocking calls made
+directly by endpoints (`run`) use a separate pool, so they neither wait behind
+queued jobs nor take their threads.
+"""
+
+import asyncio
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when the queue cannot accept more jobs."""
+
+
+@dataclass
+class Job:
+    """A generation request and its outcome."""
+    id: str
+    payload: Any
+    status: str = "queued"  # queued, running, done, failed
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Bounded job queue served by a pool of workers."""
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Any],
+        workers: int = 2,
+        max_pending: int = 32,
+        max_jobs: int = 1000,
+        sync_workers: Optional[int] = None,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.sync_workers = sync_workers or workers
+
+        # Thread pools are created by start(), so the queue can be restarted after stop()
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._job_executor: Optional[ThreadPoolExecutor] = None
+
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._subscribers: List[asyncio.Queue] = []
+
+    async def start(self):
+        """Start the worker tasks."""
+        if self._tasks:
+            return
+        # One thread per worker: each blocks on a single OpenSCAD process
+        self._job_executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="openscad-job")
+        self.executor = ThreadPoolExecutor(max_workers=self.sync_workers, thread_name_prefix="openscad")
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers and release the thread pools."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for executor in (self._job_executor, self.executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._job_executor = self.executor = None
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Run a blocking call on the pool for synchronous endpoints (not the job workers)."""
+        if self.executor is None:
+            raise RuntimeError("Job queue is not started")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def submit(self, payload: Any) -> Job:
+        """Queue a job, or raise QueueFullError when the backlog is full."""
+        job = Job(id=uuid.uuid4().hex[:12], payload=payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self.max_pending} pending)")
+
+        self._jobs[job.id] = job
+        self._trim()
+        self._publish(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond `max_jobs`."""
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_jobs:
+                break
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = datetime.now().isoformat()
+            self._publish(job)
+            try:
+                loop = asyncio.get_running_loop()
+                job.result = await loop.run_in_executor(self._job_executor, self.handler, job.payload)
+                job.status = "done"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+            job.finished_at = datetime.now().isoformat()
+            self._publish(job)
+            self._queue.task_done()
+
+    def _publish(self, job: Job):
+        event = job.to_dict()
+        for subscriber in self._subscribers:
+            subscriber.put_nowait(event)
+
+    async def events(self, job_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield job status events as they happen.
+
+        With `job_id`, yields that job's events and stops once it finishes.
+        """
+        subscriber: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(subscriber)
+        try:
+            if job_id is not None:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return
+                # Current state first, in case it finished before we subscribed
+                yield job.to_dict()
+                if job.finished:
+                    return
+            while True:
+                event = await subscriber.get()
+                if job_id is not None and event["job_id"] != job_id:
+                    continue
+                yield event
+                if job_id is not None and event["status"] in ("done", "failed"):
+                    return
+        finally:
+            self._subscribers.remove(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "sync_workers": self.sync_workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "jobs": counts,
+        }
@@ -3,21 +3,26 @@ Vibe Printing 3D - FastAPI Backend
 Generates 3D printable STL files from natural language descriptions.
 """
 
+import asyncio
+import json
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 # Add current directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from parser import DescriptionParser
+from parser import DescriptionParser, ParseCache
 from generator import OpenSCADGenerator
+from jobs import JobQueue, QueueFullError
+from downloads import file_response
 
 
 # Pydantic models
@@ -35,6 +40,40 @@ class GenerateRequest(BaseModel):
             "Um porta-lápis cilíndrico, vibe futurista",
         ]
     )
+    quality: Literal["draft", "preview", "print"] = Field(
+        "print",
+        description="Tessellation tier: draft and preview are low-poly and compile faster"
+    )
+    progressive: bool = Field(
+        True,
+        description="For print quality: return a preview first and compile the print model in the background"
+    )
+
+
+class ParseRequest(BaseModel):
+    description: str = Field(
+        ...,
+        min_length=3,
+        max_length=500,
+        description="Natural language description of the 3D object"
+    )
+
+
+class ParseBatchRequest(BaseModel):
+    descriptions: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Descriptions to parse (up to 100)"
+    )
+
+
+class ParseResponse(BaseModel):
+    object_spec: dict
+
+
+class ParseBatchResponse(BaseModel):
+    results: List[ParseResponse]
 
 
 class GenerateResponse(BaseModel):
@@ -44,12 +83,25 @@ class GenerateResponse(BaseModel):
     filename: Optional[str] = None
     object_spec: Optional[dict] = None
     scad_code: Optional[str] = None
+    quality: Optional[str] = None
+    final_job_id: Optional[str] = None
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[GenerateResponse] = None
+    error: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
     status: str
     timestamp: str
     version: str
+    openscad: Optional[dict] = None
 
 
 # Initialize FastAPI app
@@ -70,7 +122,14 @@ app.add_middleware(
 
 # Initialize parser and generator
 parser = DescriptionParser()
-generator = OpenSCADGenerator()
+parse_cache = ParseCache(parser, max_entries=int(os.environ.get("VIBE_PARSE_CACHE_SIZE", "1024")))
+generator = OpenSCADGenerator(
+    cache_max_bytes=int(float(os.environ.get("VIBE_OUTPUT_MAX_MB", "500")) * 1024 * 1024),
+    cache_ttl=float(os.environ.get("VIBE_OUTPUT_TTL_HOURS", "168")) * 3600,
+)
+
+# Seconds between sweeps of the output directory
+SWEEP_INTERVAL = float(os.environ.get("VIBE_SWEEP_INTERVAL", "600"))
 
 
 # Example descriptions for documentation
@@ -102,14 +161,31 @@ EXAMPLES = [
 async def health_check():
     """
     Health check endpoint to verify the server is running.
+    Reports "degraded" when OpenSCAD is unavailable (STL generation disabled);
+    a failed lookup is retried, so installing OpenSCAD needs no restart.
     """
+    openscad = await jobs.run(generator.openscad_status)
     return HealthResponse(
-        status="healthy",
+        status="healthy" if openscad["available"] else "degraded",
         timestamp=datetime.now().isoformat(),
-        version="1.0.0"
+        version="1.0.0",
+        openscad=openscad
     )
 
 
+@app.get("/metrics", tags=["System"])
+async def metrics():
+    """
+    Cache metrics (hits, misses, in-flight deduplication, evictions, size) and job queue depth.
+    """
+    return {
+        "stl_cache": generator.cache.stats(),
+        "parse_cache": parse_cache.stats(),
+        "scad_artifacts": generator.artifact_stats(),
+        "jobs": jobs.stats(),
+    }
+
+
 @app.get("/examples", tags=["Examples"])
 async def get_examples():
     """
@@ -118,6 +194,93 @@ async def get_examples():
     return {"examples": EXAMPLES}
 
 
+def build_model(description: str, quality: str = "print") -> GenerateResponse:
+    """
+    Parse a description and compile it to STL (blocking; runs on the worker pool).
+    """
+    # Parse description (memoized)
+    spec = parse_cache.parse(description)
+    
+    # SCAD code (for preview), rendered once and reused by generate()
+    scad_code = generator.artifact(spec, quality).code
+    
+    # Try to generate STL
+    try:
+        stl_path = generator.generate(spec, quality)
+        filename = Path(stl_path).name
+        
+        return GenerateResponse(
+            success=True,
+            message=f"Modelo {spec.object_type} gerado com sucesso!",
+            download_url=f"/download/{filename}",
+            filename=filename,
+            object_spec=spec.to_dict(),
+            scad_code=scad_code,
+            quality=quality
+        )
+    except RuntimeError as e:
+        # OpenSCAD not available - return code only
+        error_msg = str(e)
+        if "OpenSCAD not found" in error_msg:
+            return GenerateResponse(
+                success=False,
+                message="OpenSCAD não instalado. Código SCAD gerado mas STL não compilado.",
+                object_spec=spec.to_dict(),
+                scad_code=scad_code,
+                quality=quality
+            )
+        raise
+
+
+def openscad_available() -> bool:
+    """Whether OpenSCAD can compile (memoized lookup; runs on the worker pool)."""
+    try:
+        generator.openscad()
+        return True
+    except RuntimeError:
+        return False
+
+
+# Generation job queue (bounded backlog, one OpenSCAD process per worker)
+jobs = JobQueue(
+    handler=lambda request: build_model(request["description"], request["quality"]).model_dump(),
+    workers=int(os.environ.get("VIBE_WORKERS", "2")),
+    sync_workers=int(os.environ.get("VIBE_SYNC_WORKERS", os.environ.get("VIBE_WORKERS", "2"))),
+    max_pending=int(os.environ.get("VIBE_MAX_PENDING_JOBS", "32")),
+)
+
+
+async def sweep_output():
+    """Expire old artifacts and enforce the output quota periodically."""
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL)
+        try:
+            removed = await jobs.run(generator.cache.sweep)
+            if removed:
+                print(f"Output sweep: removed {removed} artifacts")
+        except Exception as e:
+            print(f"Output sweep failed: {e}")
+
+
+@app.on_event("startup")
+async def startup():
+    await jobs.start()
+    app.state.sweeper = asyncio.create_task(sweep_output())
+    
+    # Locate OpenSCAD once, off the event loop
+    openscad = await jobs.run(generator.openscad_status)
+    if openscad["available"]:
+        print(f"OpenSCAD: {openscad['path']} ({openscad['version']})")
+    else:
+        print(f"Warning: {openscad['error']}")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.sweeper.cancel()
+    await jobs.stop()
+
+
 @app.post("/generate", response_model=GenerateResponse, tags=["Generation"])
 async def generate_stl(request: GenerateRequest):
     """
@@ -130,81 +293,136 @@ async def generate_stl(request: GenerateRequest):
     - Functional attributes (com tampa, com divisórias, com furo)
     
     Returns the generated STL file path and object specifications.
+    The compile runs on the worker pool, so other requests are not blocked.
+    
+    With quality "print" and `progressive`, a model that needs an OpenSCAD
+    compile is returned as a preview first; the print model is queued as a
+    job (`final_job_id`) whose result replaces the preview when done.
+    Without OpenSCAD the print-tier SCAD code is returned as before.
     """
     try:
-        # Parse description
-        spec = parser.parse(request.description)
-        
-        # Generate SCAD code (for preview)
-        scad_code = generator._generate_scad_code(spec)
-        
-        # Try to generate STL
-        try:
-            stl_path = generator.generate(spec)
-            filename = Path(stl_path).name
-            
-            return GenerateResponse(
-                success=True,
-                message=f"Modelo {spec.object_type} gerado com sucesso!",
-                download_url=f"/download/{filename}",
-                filename=filename,
-                object_spec=spec.to_dict(),
-                scad_code=scad_code
-            )
-        except RuntimeError as e:
-            # OpenSCAD not available - return code only
-            error_msg = str(e)
-            if "OpenSCAD not found" in error_msg:
-                return GenerateResponse(
-                    success=False,
-                    message="OpenSCAD não instalado. Código SCAD gerado mas STL não compilado.",
-                    object_spec=spec.to_dict(),
-                    scad_code=scad_code
-                )
-            raise
-            
+        if request.quality == "print" and request.progressive:
+            spec = parse_cache.parse(request.description)
+            if generator.needs_compile(spec, "print") and await jobs.run(openscad_available):
+                response = await jobs.run(build_model, request.description, "preview")
+                if response.success:
+                    try:
+                        job = jobs.submit({"description": request.description, "quality": "print"})
+                        response.final_job_id = job.id
+                    except QueueFullError:
+                        # Preview only; the client can request print quality later
+                        pass
+                return response
+        return await jobs.run(build_model, request.description, request.quality)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/download/{filename}", tags=["Download"])
-async def download_stl(filename: str):
-    """
-    Download a generated STL file.
+@app.post("/parse", response_model=ParseResponse, tags=["Parsing"])
+async def parse_description(request: ParseRequest):
     """
-    file_path = generator.output_dir / filename
+    Parse a description into an object specification without generating anything.
     
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="File not found")
+    Results are memoized by normalized description, so validating a spec
+    while the user types is cheap.
+    """
+    return ParseResponse(object_spec=parse_cache.parse(request.description).to_dict())
+
+
+@app.post("/parse/batch", response_model=ParseBatchResponse, tags=["Parsing"])
+async def parse_batch(request: ParseBatchRequest):
+    """
+    Parse several descriptions in one request (results in input order).
+    """
+    return ParseBatchResponse(results=[
+        ParseResponse(object_spec=parse_cache.parse(description).to_dict())
+        for description in request.descriptions
+    ])
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202, tags=["Jobs"])
+async def submit_job(request: GenerateRequest):
+    """
+    Queue a generation job and return immediately.
     
-    if not filename.endswith('.stl'):
-        raise HTTPException(status_code=400, detail="Invalid file type")
+    Poll `GET /jobs/{job_id}` or stream `GET /jobs/{job_id}/events` for the result.
+    Returns 503 when the queue is full.
+    """
+    try:
+        job = jobs.submit({"description": request.description, "quality": request.quality})
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return JobResponse(**job.to_dict())
+
+
+@app.get("/jobs/events", tags=["Jobs"])
+async def stream_job_events():
+    """
+    Server-sent events with the status changes of all jobs.
+    """
+    return StreamingResponse(_sse(jobs.events()), media_type="text/event-stream")
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
+async def get_job(job_id: str):
+    """
+    Get the status (and result, once finished) of a generation job.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**job.to_dict())
+
+
+@app.get("/jobs/{job_id}/events", tags=["Jobs"])
+async def stream_job(job_id: str):
+    """
+    Server-sent events for one job; the stream ends when the job finishes.
+    """
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(_sse(jobs.events(job_id)), media_type="text/event-stream")
+
+
+async def _sse(events):
+    async for event in events:
+        yield f"event: job\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+@app.get("/download/{filename}", tags=["Download"])
+async def download_stl(filename: str, request: Request):
+    """
+    Download a generated (binary) STL file.
     
-    return FileResponse(
-        path=str(file_path),
-        filename=filename,
-        media_type="application/sla"
-    )
+    Supports gzip/brotli content encoding and HTTP range requests.
+    """
+    return _download(request, filename, ".stl", "application/sla")
 
 
 @app.get("/download-scad/{filename}", tags=["Download"])
-async def download_scad(filename: str):
+async def download_scad(filename: str, request: Request):
     """
     Download the OpenSCAD source file.
     """
-    file_path = generator.output_dir / filename
+    return _download(request, filename, ".scad", "text/plain")
+
+
+def _download(request: Request, filename: str, suffix: str, media_type: str):
+    # Checked first, so other artifacts of the entry (e.g. .stl.gz) are not counted as downloads
+    if not filename.endswith(suffix):
+        raise HTTPException(status_code=400, detail="Invalid file type")
     
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="File not found")
+    # Resolved from the artifact index: unknown names never touch the disk
+    file_path = generator.cache.lookup(filename)
     
-    if not filename.endswith('.scad'):
-        raise HTTPException(status_code=400, detail="Invalid file type")
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(
-        path=str(file_path),
-        filename=filename,
-        media_type="text/plain"
-    )
+    try:
+        return file_response(request, file_path, filename, media_type, etag=file_path.stem)
+    except FileNotFoundError:
+        # Evicted or expired by a sweep after the lookup
+        raise HTTPException(status_code=404, detail="File not found")
 
 
 @app.get("/", tags=["System"])
@@ -218,8 +436,11 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "generate": "/generate",
+            "jobs": "/jobs",
             "parse": "/parse",
+            "parse_batch": "/parse/batch",
             "examples": "/examples",
             "download": "/download/{filename}",
             "docs": "/docs"
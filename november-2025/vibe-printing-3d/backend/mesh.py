@@ -0,0 +1,277 @@
+"""
+Direct mesh backend: builds triangle meshes for simple ObjectSpecs with NumPy
+and writes binary STL, without an OpenSCAD/CGAL compile.
+
+Meshes are triangle soups, arrays of shape (n, 3, 3), wound counter-clockwise
+seen from outside. Each part is one closed, manifold shell: solids that touch
+in the OpenSCAD templates (tray dividers, the box lid's lip) are built already
+fused, and only parts that are apart (the lid above its box) stay separate
+shells. Geometry matches the OpenSCAD templates in generator.py for the shapes
+listed in MeshBuilder.supports; everything else falls back to OpenSCAD.
+"""
+
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple, Union
+
+import numpy as np
+
+from parser import ObjectSpec
+
+
+# Binary STL record: normal, three vertices, attribute byte count (50 bytes)
+STL_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attr", "<u2"),
+])
+
+VERTEX_PATTERN = re.compile(r'vertex\s+(\S+)\s+(\S+)\s+(\S+)')
+
+
+def _triangulate_quads(quads: np.ndarray) -> np.ndarray:
+    """(n, 4, 3) planar quads -> (2n, 3, 3) triangles with the same winding."""
+    return np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]])
+
+
+def _lift(points: np.ndarray, z: float) -> np.ndarray:
+    """(n, 2) polygon -> (n, 3) at height z."""
+    return np.column_stack([points, np.full(len(points), z)])
+
+
+def polygon_walls(points: np.ndarray, z0: float, z1: float, outward: bool = True) -> np.ndarray:
+    """Side walls of a prism over a counter-clockwise (n, 2) polygon."""
+    bottom, top = _lift(points, z0), _lift(points, z1)
+    nxt = np.roll(np.arange(len(points)), -1)
+    quads = np.stack([bottom, bottom[nxt], top[nxt], top], axis=1)
+    if not outward:
+        quads = quads[:, ::-1]
+    return _triangulate_quads(quads)
+
+
+def polygon_cap(points: np.ndarray, z: float, up: bool = True) -> np.ndarray:
+    """Fan triangulation of a convex counter-clockwise polygon at height z."""
+    lifted = _lift(points, z)
+    tris = np.stack([
+        np.broadcast_to(lifted[0], (len(points) - 2, 3)),
+        lifted[1:-1],
+        lifted[2:],
+    ], axis=1)
+    return tris if up else tris[:, ::-1]
+
+
+def centered_cap(points: np.ndarray, z: float, up: bool = True) -> np.ndarray:
+    """Fan around the centroid of a convex polygon (collinear vertices allowed)."""
+    lifted = _lift(points, z)
+    center = np.broadcast_to(lifted.mean(axis=0), (len(points), 3))
+    tris = np.stack([center, lifted, np.roll(lifted, -1, axis=0)], axis=1)
+    return tris if up else tris[:, ::-1]
+
+
+def polygon_ring(outer: np.ndarray, inner: np.ndarray, z: float) -> np.ndarray:
+    """Upward-facing band between two matching counter-clockwise polygons."""
+    o, i = _lift(outer, z), _lift(inner, z)
+    nxt = np.roll(np.arange(len(outer)), -1)
+    return _triangulate_quads(np.stack([o, o[nxt], i[nxt], i], axis=1))
+
+
+def prism(points: np.ndarray, z0: float, z1: float) -> np.ndarray:
+    """Closed prism (extruded convex polygon)."""
+    return np.concatenate([
+        polygon_walls(points, z0, z1),
+        polygon_cap(points, z0, up=False),
+        polygon_cap(points, z1, up=True),
+    ])
+
+
+def open_container(outer: np.ndarray, inner: np.ndarray, height: float, floor: float) -> np.ndarray:
+    """
+    Watertight open-top container: outer prism minus an inner cavity that
+    starts at `floor` and is open at the top (difference() in the templates).
+    """
+    return np.concatenate([
+        polygon_walls(outer, 0, height),
+        polygon_cap(outer, 0, up=False),
+        polygon_walls(inner, floor, height, outward=False),
+        polygon_cap(inner, floor, up=True),
+        polygon_ring(outer, inner, height),
+    ])
+
+
+def compartment_container(
+    width: float, depth: float, height: float, floor: float,
+    pockets: List[Tuple[float, float]], margin: float,
+) -> np.ndarray:
+    """
+    Watertight block with open-top pockets side by side along x: pocket
+    (x0, x1) spans y in [margin, depth - margin] from `floor` to the top.
+    This is a container with internal walls between compartments, built as
+    one shell. The top face is a grid on every pocket edge, and the outer
+    walls and bottom share its boundary vertices, so there are no T-junctions.
+    """
+    xs = sorted({0.0, width, *(x for pocket in pockets for x in pocket)})
+    ys = [0.0, margin, depth - margin, depth]
+    holes = {(x0, margin) for x0, _ in pockets}
+    outline = np.array(
+        [(x, 0.0) for x in xs[:-1]] + [(width, y) for y in ys[:-1]]
+        + [(x, depth) for x in xs[:0:-1]] + [(0.0, y) for y in ys[:0:-1]],
+        dtype=float,
+    )
+    parts = [
+        polygon_walls(outline, 0, height),
+        centered_cap(outline, 0, up=False),
+    ]
+    parts.extend(
+        polygon_cap(rectangle(x0, y0, x1, y1), height)
+        for x0, x1 in zip(xs, xs[1:]) for y0, y1 in zip(ys, ys[1:])
+        if (x0, y0) not in holes
+    )
+    for x0, x1 in pockets:
+        pocket = rectangle(x0, margin, x1, depth - margin)
+        parts.append(polygon_walls(pocket, floor, height, outward=False))
+        parts.append(polygon_cap(pocket, floor, up=True))
+    return np.concatenate(parts)
+
+
+def rectangle(x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=float)
+
+
+def circle(diameter: float, segments: int) -> np.ndarray:
+    """Regular polygon with OpenSCAD's $fn vertex placement (first at angle 0)."""
+    angles = np.arange(segments) * (2 * np.pi / segments)
+    return (diameter / 2) * np.column_stack([np.cos(angles), np.sin(angles)])
+
+
+def write_binary_stl(path: Union[str, Path], triangles: np.ndarray, header: bytes = b"vibe-printing-3d") -> None:
+    """Write a triangle soup as binary STL (normals computed vectorized)."""
+    triangles = np.asarray(triangles, dtype=np.float32)
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    records = np.zeros(len(triangles), dtype=STL_DTYPE)
+    records["normal"] = normals
+    records["vertices"] = triangles
+
+    with open(path, "wb") as f:
+        f.write(header[:80].ljust(80, b"\0"))
+        f.write(np.uint32(len(triangles)).tobytes())
+        records.tofile(f)
+
+
+def is_binary_stl(path: Union[str, Path]) -> bool:
+    """Binary STL files are exactly 84 + 50 * triangle_count bytes."""
+    size = Path(path).stat().st_size
+    if size < 84:
+        return False
+    with open(path, "rb") as f:
+        f.seek(80)
+        count = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+    return size == 84 + 50 * count
+
+
+def read_ascii_stl(path: Union[str, Path]) -> np.ndarray:
+    """Triangle soup from an ASCII STL (one regex pass over the vertex lines)."""
+    rows = VERTEX_PATTERN.findall(Path(path).read_text())
+    return np.array(rows, dtype=np.float64).reshape(-1, 3, 3)
+
+
+def ensure_binary_stl(path: Union[str, Path]) -> bool:
+    """Rewrite an ASCII STL in place as binary. Returns True if converted."""
+    if is_binary_stl(path):
+        return False
+    write_binary_stl(path, read_ascii_stl(path))
+    return True
+
+
+class MeshBuilder:
+    """Builds meshes for the ObjectSpecs that are plain boxes, cups and trays."""
+
+    def __init__(self):
+        self._builders: Dict[str, Callable[[ObjectSpec, int], np.ndarray]] = {
+            "box": self._build_box,
+            "tray": self._build_tray,
+            "cylinder": self._build_cylinder,
+        }
+
+    def supports(self, spec: ObjectSpec) -> bool:
+        """Whether this backend reproduces the OpenSCAD template for `spec`."""
+        if spec.object_type not in self._builders:
+            return False
+        # Rounded (minkowski/sphere) and decorated variants need CGAL
+        if spec.object_type == "tray" and spec.style == "organic":
+            return False
+        if spec.object_type == "cylinder" and spec.style in ("futuristic", "organic"):
+            return False
+        # Degenerate cavities: let OpenSCAD decide what to produce
+        wall = spec.wall_thickness
+        if spec.width <= 2 * wall or spec.height <= wall:
+            return False
+        if spec.object_type != "cylinder" and spec.depth <= 2 * wall:
+            return False
+        # Dividers as wide as their compartments leave no pocket between them
+        if spec.object_type == "tray" and spec.has_dividers and spec.divider_count > 0:
+            if (spec.width - wall) / (spec.divider_count + 1) <= wall:
+                return False
+        # A lip reaching the box floor would touch the box
+        if spec.object_type == "box" and spec.has_lid and spec.height + 2 - wall * 0.8 <= wall:
+            return False
+        return True
+
+    def build(self, spec: ObjectSpec, segments: int = 64) -> np.ndarray:
+        """Triangle soup for `spec` (`segments` plays the role of $fn)."""
+        if not self.supports(spec):
+            raise ValueError(f"Mesh backend does not support {spec.object_type} ({spec.style})")
+        return self._builders[spec.object_type](spec, segments)
+
+    def generate(self, spec: ObjectSpec, stl_path: Union[str, Path], segments: int = 64) -> None:
+        write_binary_stl(stl_path, self.build(spec, segments))
+
+    def _build_box(self, spec: ObjectSpec, segments: int) -> np.ndarray:
+        width, depth, height, wall = spec.width, spec.depth, spec.height, spec.wall_thickness
+        parts = [open_container(
+            rectangle(0, 0, width, depth),
+            rectangle(wall, wall, width - wall, depth - wall),
+            height, wall,
+        )]
+
+        if spec.has_lid:
+            # Lid top and the lip under it, fused: the lip replaces the middle of the lid's underside
+            lip = wall * 0.8
+            top = height + 2
+            plate = rectangle(0, 0, width, depth)
+            inset = rectangle(wall + 0.2, wall + 0.2, width - wall - 0.2, depth - wall - 0.2)
+            parts.extend([
+                polygon_walls(plate, top, top + wall),
+                polygon_cap(plate, top + wall, up=True),
+                polygon_ring(plate, inset, top)[:, ::-1],
+                polygon_walls(inset, top - lip, top),
+                polygon_cap(inset, top - lip, up=False),
+            ])
+        return np.concatenate(parts)
+
+    def _build_tray(self, spec: ObjectSpec, segments: int) -> np.ndarray:
+        width, depth, height, wall = spec.width, spec.depth, spec.height, spec.wall_thickness
+        divider_count = spec.divider_count if spec.has_dividers else 0
+        if divider_count == 0:
+            return open_container(
+                rectangle(0, 0, width, depth),
+                rectangle(wall, wall, width - wall, depth - wall),
+                height, wall,
+            )
+
+        # Dividers at x = i * compartment_width split the cavity into pockets
+        compartment_width = (width - wall) / (divider_count + 1)
+        edges = [wall] + [i * compartment_width + wall for i in range(1, divider_count + 1)]
+        ends = [i * compartment_width for i in range(1, divider_count + 1)] + [width - wall]
+        return compartment_container(width, depth, height, wall, list(zip(edges, ends)), wall)
+
+    def _build_cylinder(self, spec: ObjectSpec, segments: int) -> np.ndarray:
+        diameter, height, wall = spec.width, spec.height, spec.wall_thickness
+        segments = max(segments, 3)
+        return open_container(
+            circle(diameter, segments),
+            circle(diameter - 2 * wall, segments),
+            height, wall,
+        )
@@ -4,8 +4,10 @@ Uses regex and heuristics - no external ML models required.
 """
 
 import re
-from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Optional, List, Dict, Any, FrozenSet, Iterable
 
 
 @dataclass
@@ -48,6 +50,54 @@ class ObjectSpec:
         }
 
 
+class KeywordMatcher:
+    """
+    Finds which of a set of keywords occur (as substrings) in a text with a
+    single regex scan.
+    
+    The keywords are compiled into one trie-shaped regex inside a lookahead,
+    which reports the longest keyword starting at each position; shorter
+    keywords starting at the same position are prefixes of it and come from
+    a precomputed table, so the result equals testing `keyword in text` for
+    every keyword.
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        unique = set(keywords)
+        self.pattern = re.compile("(?=(" + self._trie_pattern(unique) + "))")
+        self._implied: Dict[str, FrozenSet[str]] = {
+            kw: frozenset(other for other in unique if kw.startswith(other))
+            for kw in unique
+        }
+    
+    @staticmethod
+    def _trie_pattern(keywords: Iterable[str]) -> str:
+        """Regex with shared prefixes factored out (longest match first)."""
+        trie: Dict[str, Any] = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        
+        def emit(node: Dict[str, Any]) -> str:
+            branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            # A keyword ends here: the continuation is optional (greedy)
+            return f"(?:{body})?" if "" in node else body
+        
+        return emit(trie)
+    
+    def find(self, text: str) -> FrozenSet[str]:
+        """Keywords contained in `text`."""
+        found = set()
+        for longest in set(self.pattern.findall(text)):
+            found |= self._implied[longest]
+        return frozenset(found)
+
+
 class DescriptionParser:
     """Parser for natural language 3D object descriptions."""
     
@@ -77,12 +127,33 @@ class DescriptionParser:
         "has_hook": ["gancho", "ganchos", "hook", "hooks"],
     }
     
+    # Descriptive angles, checked in order
+    ANGLE_WORDS = {"inclinado": 30.0, "inclinada": 30.0, "vertical": 90.0, "horizontal": 0.0}
+    
+    # Words that imply dividers even without a count pattern
+    COUNT_TRIGGERS = ["divisória", "compartimento"]
+    
+    # Stems of the nouns in count_pattern (all are keywords)
+    COUNT_NOUNS = frozenset(["divisória", "compartimento", "separador", "furo"])
+    
     def __init__(self):
         # Compile regex patterns
         self._compile_patterns()
+        
+        # Every keyword of every table, found in one scan of the text
+        self.matcher = KeywordMatcher(
+            [kw for table in (self.OBJECT_TYPES, self.STYLES, self.FUNCTIONAL_ATTRS) for kws in table.values() for kw in kws]
+            + list(self.ANGLE_WORDS) + self.COUNT_TRIGGERS + list(self.COUNT_NOUNS) + list(self.number_words)
+        )
+        self._object_types = [(t, frozenset(kws)) for t, kws in self.OBJECT_TYPES.items()]
+        self._styles = [(s, frozenset(kws)) for s, kws in self.STYLES.items()]
+        self._functional_attrs = [(a, frozenset(kws)) for a, kws in self.FUNCTIONAL_ATTRS.items()]
     
     def _compile_patterns(self):
         """Compile regex patterns for dimension extraction."""
+        # Dimensions and angles need a number: cheap check before those scans
+        self.digit_pattern = re.compile(r'\d')
+        
         # Pattern for dimensions like "10x5x3 cm" or "100x50x30 mm"
         self.dim_pattern = re.compile(
             r'(\d+(?:[.,]\d+)?)\s*[xX×]\s*(\d+(?:[.,]\d+)?)\s*[xX×]\s*(\d+(?:[.,]\d+)?)\s*(cm|mm|m)?',
@@ -122,25 +193,31 @@ class DescriptionParser:
         spec = ObjectSpec(raw_description=description)
         desc_lower = description.lower()
         
+        # Keyword hits and dimension matches, computed once for all stages
+        hits = self.matcher.find(desc_lower)
+        has_digits = self.digit_pattern.search(description) is not None
+        dim_match = self.dim_pattern.search(description) if has_digits else None
+        single_match = self.single_dim_pattern.search(description) if has_digits and not dim_match else None
+        
         # Extract object type
-        spec.object_type = self._extract_object_type(desc_lower)
+        spec.object_type = self._extract_object_type(hits)
         
         # Extract dimensions
-        self._extract_dimensions(description, spec)
+        self._extract_dimensions(dim_match, single_match, spec)
         
         # Extract style
-        spec.style = self._extract_style(desc_lower)
+        spec.style = self._extract_style(hits)
         
         # Extract functional attributes
-        self._extract_functional_attrs(desc_lower, spec)
+        self._extract_functional_attrs(hits, spec)
         
         # Extract angle if present
-        angle = self._extract_angle(description)
+        angle = self._extract_angle(description, hits, has_digits)
         if angle is not None:
             spec.angle = angle
         
         # Extract divider count if present
-        divider_count = self._extract_count(description)
+        divider_count = self._extract_count(desc_lower, hits)
         if divider_count > 0:
             spec.has_dividers = True
             spec.divider_count = divider_count
@@ -149,27 +226,25 @@ class DescriptionParser:
         self._apply_style_modifications(spec)
         
         # Set default dimensions based on object type if not specified
-        self._apply_type_defaults(spec, description)
+        self._apply_type_defaults(spec, bool(dim_match or single_match))
         
         return spec
     
-    def _extract_object_type(self, desc_lower: str) -> str:
-        """Extract the object type from description."""
-        for obj_type, keywords in self.OBJECT_TYPES.items():
-            for keyword in keywords:
-                if keyword in desc_lower:
-                    return obj_type
+    def _extract_object_type(self, hits: FrozenSet[str]) -> str:
+        """Extract the object type from the keyword hits (table order wins)."""
+        for obj_type, keywords in self._object_types:
+            if not hits.isdisjoint(keywords):
+                return obj_type
         return "box"  # Default
     
-    def _extract_dimensions(self, description: str, spec: ObjectSpec):
-        """Extract dimensions from description."""
-        # Try to find 3D dimensions (WxDxH)
-        match = self.dim_pattern.search(description)
-        if match:
-            w = float(match.group(1).replace(',', '.'))
-            d = float(match.group(2).replace(',', '.'))
-            h = float(match.group(3).replace(',', '.'))
-            unit = match.group(4)
+    def _extract_dimensions(self, dim_match: Optional[re.Match], single_match: Optional[re.Match], spec: ObjectSpec):
+        """Extract dimensions from the dimension regex matches."""
+        # 3D dimensions (WxDxH)
+        if dim_match:
+            w = float(dim_match.group(1).replace(',', '.'))
+            d = float(dim_match.group(2).replace(',', '.'))
+            h = float(dim_match.group(3).replace(',', '.'))
+            unit = dim_match.group(4)
             
             # Convert to mm
             multiplier = self._get_unit_multiplier(unit)
@@ -178,12 +253,11 @@ class DescriptionParser:
             spec.height = h * multiplier
             return
         
-        # Try to find individual dimensions
-        matches = self.single_dim_pattern.findall(description)
-        if matches:
+        # Individual dimension
+        if single_match:
             # Use first dimension found as a reference
-            value = float(matches[0][0].replace(',', '.'))
-            unit = matches[0][1]
+            value = float(single_match.group(1).replace(',', '.'))
+            unit = single_match.group(2)
             multiplier = self._get_unit_multiplier(unit)
             base_size = value * multiplier
             
@@ -205,42 +279,36 @@ class DescriptionParser:
             return 1.0
         return 10.0  # Default to cm
     
-    def _extract_style(self, desc_lower: str) -> str:
-        """Extract style from description."""
-        for style, keywords in self.STYLES.items():
-            for keyword in keywords:
-                if keyword in desc_lower:
-                    return style
+    def _extract_style(self, hits: FrozenSet[str]) -> str:
+        """Extract style from the keyword hits."""
+        for style, keywords in self._styles:
+            if not hits.isdisjoint(keywords):
+                return style
         return "default"
     
-    def _extract_functional_attrs(self, desc_lower: str, spec: ObjectSpec):
-        """Extract functional attributes from description."""
-        for attr, keywords in self.FUNCTIONAL_ATTRS.items():
-            for keyword in keywords:
-                if keyword in desc_lower:
-                    setattr(spec, attr, True)
-                    break
+    def _extract_functional_attrs(self, hits: FrozenSet[str], spec: ObjectSpec):
+        """Extract functional attributes from the keyword hits."""
+        for attr, keywords in self._functional_attrs:
+            if not hits.isdisjoint(keywords):
+                setattr(spec, attr, True)
     
-    def _extract_angle(self, description: str) -> Optional[float]:
+    def _extract_angle(self, description: str, hits: FrozenSet[str], has_digits: bool = True) -> Optional[float]:
         """Extract angle from description."""
-        match = self.angle_pattern.search(description)
+        match = self.angle_pattern.search(description) if has_digits else None
         if match:
             return float(match.group(1).replace(',', '.'))
         
         # Check for descriptive angles
-        desc_lower = description.lower()
-        if "inclinado" in desc_lower or "inclinada" in desc_lower:
-            return 30.0
-        if "vertical" in desc_lower:
-            return 90.0
-        if "horizontal" in desc_lower:
-            return 0.0
+        for word, angle in self.ANGLE_WORDS.items():
+            if word in hits:
+                return angle
         
         return None
     
-    def _extract_count(self, description: str) -> int:
+    def _extract_count(self, desc_lower: str, hits: FrozenSet[str]) -> int:
         """Extract count for dividers/compartments."""
-        match = self.count_pattern.search(description.lower())
+        # The count pattern needs one of its nouns: skip the scan otherwise
+        match = self.count_pattern.search(desc_lower) if not hits.isdisjoint(self.COUNT_NOUNS) else None
         if match:
             count_str = match.group(1)
             if count_str.isdigit():
@@ -248,10 +316,9 @@ class DescriptionParser:
             return self.number_words.get(count_str, 0)
         
         # Check for "três divisórias" without explicit pattern
-        desc_lower = description.lower()
-        if "divisória" in desc_lower or "compartimento" in desc_lower:
+        if any(word in hits for word in self.COUNT_TRIGGERS):
             for word, num in self.number_words.items():
-                if word in desc_lower:
+                if word in hits:
                     return num
             return 2  # Default to 2 dividers
         
@@ -266,11 +333,8 @@ class DescriptionParser:
         elif spec.style == "futuristic":
             spec.wall_thickness = 2.0
     
-    def _apply_type_defaults(self, spec: ObjectSpec, description: str):
+    def _apply_type_defaults(self, spec: ObjectSpec, has_dims: bool):
         """Apply default dimensions based on object type if not specified."""
-        # Check if dimensions were explicitly specified
-        has_dims = self.dim_pattern.search(description) or self.single_dim_pattern.search(description)
-        
         if not has_dims:
             if spec.object_type == "box":
                 spec.width = 80.0
@@ -294,6 +358,65 @@ class DescriptionParser:
                 spec.height = 80.0
 
 
+class ParseCache:
+    """
+    Bounded LRU cache of parsed descriptions.
+    
+    Keys are normalized descriptions (lowercase, whitespace collapsed), so
+    the keystrokes of a user typing the same text share entries. Every call
+    returns a fresh ObjectSpec carrying the caller's raw description; cached
+    specs are never handed out.
+    """
+    
+    def __init__(self, parser: DescriptionParser, max_entries: int = 1024):
+        self.parser = parser
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, ObjectSpec]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def normalize(description: str) -> str:
+        return " ".join(description.lower().split())
+    
+    def parse(self, description: str) -> ObjectSpec:
+        """Parse `description`, reusing the spec of an equivalent description."""
+        key = self.normalize(description)
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return replace(spec, raw_description=description)
+            self.misses += 1
+        
+        # Parsing is cheap: a concurrent miss on the same key just parses twice
+        spec = self.parser.parse(key)
+        with self._lock:
+            self._entries[key] = spec
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return replace(spec, raw_description=description)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
 # Example usage and testing
 if __name__ == "__main__":
     parser = DescriptionParser()
@@ -0,0 +1,265 @@
+"""
+Content-addressed artifact cache and lifecycle manager for the output directory.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional, Tuple
+
+
+# Artifact stems look like "<object_type>_<key>", key = 16 hex chars
+KEY_LENGTH = 16
+STEM_PATTERN = re.compile(r'^[a-z]+_([0-9a-f]{%d})$' % KEY_LENGTH)
+
+
+def content_key(content: str) -> str:
+    """Hash of the content that fully determines an artifact (e.g. SCAD code)."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:KEY_LENGTH]
+
+
+@dataclass
+class CacheEntry:
+    stem: str
+    size: int
+    last_used: float = field(default_factory=time.time)
+
+
+class STLCache:
+    """
+    LRU cache of compiled artifacts on disk, keyed by content hash.
+
+    Each entry is a group of files sharing a stem (e.g. ``box_<key>.stl``,
+    ``box_<key>.stl.gz`` and ``box_<key>.scad``). Concurrent requests for the
+    same key are deduplicated: only the first caller builds, the others wait
+    for its result.
+
+    The in-memory index is the source of truth for the output directory:
+    downloads are resolved with `lookup` (no filesystem access on a miss),
+    entries are evicted least recently used/downloaded first when over
+    `max_bytes`, and `sweep` expires entries unused for `ttl` seconds along
+    with stray files left by older versions.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = 500 * 1024 * 1024,
+        suffixes: Tuple[str, ...] = (".stl", ".scad"),
+        ttl: Optional[float] = 7 * 24 * 3600,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.suffixes = suffixes
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._stems: Dict[str, str] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.inflight_waits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.downloads = 0
+        self.download_misses = 0
+        self.sweeps = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the index from disk, least recently modified first."""
+        found = []
+        for path in self.cache_dir.glob(f"*{self.suffixes[0]}"):
+            if ".partial" in path.name:
+                path.unlink(missing_ok=True)
+                continue
+            match = STEM_PATTERN.match(path.stem)
+            if match:
+                found.append((path.stat().st_mtime, match.group(1), path.stem))
+
+        for mtime, key, stem in sorted(found):
+            self._add(key, stem, last_used=mtime)
+        self._evict()
+
+    def _entry_size(self, stem: str) -> int:
+        size = 0
+        for suffix in self.suffixes:
+            path = self.cache_dir / f"{stem}{suffix}"
+            if path.exists():
+                size += path.stat().st_size
+        return size
+
+    def _add(self, key: str, stem: str, last_used: Optional[float] = None):
+        entry = CacheEntry(stem=stem, size=self._entry_size(stem))
+        if last_used is not None:
+            entry.last_used = last_used
+        self._entries[key] = entry
+        self._stems[stem] = key
+        self.total_bytes += entry.size
+
+    def _touch(self, key: str):
+        self._entries.move_to_end(key)
+        self._entries[key].last_used = time.time()
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def path_for(self, stem: str, suffix: str = ".stl") -> Path:
+        return self.cache_dir / f"{stem}{suffix}"
+
+    def lookup(self, filename: str) -> Optional[Path]:
+        """
+        Resolve a download by file name from the index (marks it as used).
+        Returns None for unknown names without touching the filesystem.
+        """
+        stem, dot, suffix = filename.partition(".")
+        with self._lock:
+            key = self._stems.get(stem)
+            if key is None or f"{dot}{suffix}" not in self.suffixes:
+                self.download_misses += 1
+                return None
+            self._touch(key)
+            self.downloads += 1
+        return self.path_for(stem, f"{dot}{suffix}")
+
+    def get_or_build(self, key: str, stem: str, build: Callable[[Path], None]) -> Path:
+        """
+        Return the primary artifact for `key`, building it on a miss.
+
+        `build` receives a temporary path for the primary file and may write
+        the other suffixes directly under `stem`.
+        """
+        path = self.path_for(stem, self.suffixes[0])
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and path.exists():
+                self._touch(key)
+                self.hits += 1
+                return path
+            if entry is not None:
+                # Deleted behind our back: forget it and rebuild
+                self._drop(key)
+
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+                self.misses += 1
+            else:
+                self.inflight_waits += 1
+
+        if not owner:
+            return pending.result()
+
+        try:
+            partial = self.path_for(f"{stem}.partial", self.suffixes[0])
+            try:
+                build(partial)
+                partial.replace(path)
+            finally:
+                partial.unlink(missing_ok=True)
+
+            with self._lock:
+                self._add(key, stem)
+                self._evict(keep=key)
+            pending.set_result(path)
+            return path
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self._stems.pop(entry.stem, None)
+        self.total_bytes -= entry.size
+        for suffix in self.suffixes:
+            self.path_for(entry.stem, suffix).unlink(missing_ok=True)
+
+    def _evict(self, keep: str = None):
+        """Remove least recently used entries until under the size bound."""
+        while self.total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if key == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(key)
+                continue
+            self._drop(key)
+            self.evictions += 1
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        Expire entries unused for `ttl` seconds, enforce the size bound and
+        delete unindexed artifact files older than `ttl`.
+        Returns the number of entries and stray files removed.
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            self.sweeps += 1
+            if self.ttl is not None:
+                cutoff = now - self.ttl
+                # LRU order: stop at the first entry still in use
+                for key in list(self._entries):
+                    if self._entries[key].last_used >= cutoff:
+                        break
+                    self._drop(key)
+                    self.expirations += 1
+                    removed += 1
+            before = self.evictions
+            self._evict()
+            removed += self.evictions - before
+            known = set(self._stems)
+
+        if self.ttl is None:
+            return removed
+
+        # Files the index does not own (e.g. uuid-named outputs of older versions)
+        for path in self.cache_dir.iterdir():
+            stem = path.name.partition(".")[0]
+            if stem in known or not any(path.name.endswith(s) for s in self.suffixes):
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            # Waiting on an in-flight build also avoids a compile
+            served = self.hits + self.inflight_waits
+            lookups = served + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "inflight_waits": self.inflight_waits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "downloads": self.downloads,
+                "download_misses": self.download_misses,
+                "sweeps": self.sweeps,
+                "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            }
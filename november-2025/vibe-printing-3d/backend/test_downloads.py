@@ -0,0 +1,88 @@
+"""
+Content negotiation and caching headers of artifact downloads.
+"""
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from downloads import ENCODINGS, _accepted_encodings, file_response, write_encoded_variants
+
+
+def test_malformed_q_value_is_not_acceptable():
+    assert _accepted_encodings("gzip;q=abc, br") == ["br"]
+    assert _accepted_encodings("gzip;q=0.5, identity;q=0") == ["gzip"]
+
+
+def _client(tmp_path) -> TestClient:
+    path = tmp_path / "model.stl"
+    path.write_bytes(b"solid model\n" * 100)
+    write_encoded_variants(path)
+
+    app = FastAPI()
+
+    @app.get("/download")
+    async def download(request: Request):
+        return file_response(request, path, path.name, "application/sla", etag=path.stem)
+
+    return TestClient(app)
+
+
+def test_each_encoding_has_its_own_etag(tmp_path):
+    client = _client(tmp_path)
+    identity = client.get("/download", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/download", headers={"Accept-Encoding": "gzip;q=abc, gzip"})
+
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert identity.headers["etag"] == '"model"'
+    assert gzipped.headers["etag"] == '"model-gz"'
+    assert identity.headers["vary"] == gzipped.headers["vary"] == "Accept-Encoding"
+    assert gzipped.content == identity.content
+
+
+def test_not_modified_only_for_the_matching_variant(tmp_path):
+    client = _client(tmp_path)
+    etag = '"model-gz"'
+
+    cached = client.get("/download", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.headers["vary"] == "Accept-Encoding"
+
+    # A client without gzip must not revalidate against the gzip representation
+    other = client.get("/download", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["etag"] == '"model"'
+
+
+def test_range_uses_identity_etag(tmp_path):
+    client = _client(tmp_path)
+    response = client.get("/download", headers={"Accept-Encoding": ", ".join(ENCODINGS), "Range": "bytes=0-4"})
+
+    assert response.status_code == 206
+    assert response.content == b"solid"
+    assert response.headers["etag"] == '"model"'
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_invalid_or_multi_range_is_ignored(tmp_path):
+    client = _client(tmp_path)
+    full = client.get("/download", headers={"Accept-Encoding": "identity"}).content
+
+    for header in ("bytes=0-1,5-6", "bytes=5-2", "items=0-1", "bytes=-"):
+        response = client.get("/download", headers={"Accept-Encoding": "gzip", "Range": header})
+        assert response.status_code == 200, header
+        assert "content-range" not in response.headers
+        # Ignored range: compression is still negotiated
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == '"model-gz"'
+        assert response.content == full
+
+
+def test_unsatisfiable_range_is_416(tmp_path):
+    client = _client(tmp_path)
+    size = len(client.get("/download", headers={"Accept-Encoding": "identity"}).content)
+
+    response = client.get("/download", headers={"Range": f"bytes={size}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{size}"
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import Header from './components/Header';
 import DescriptionInput from './components/DescriptionInput';
 import Examples from './components/Examples';
@@ -16,12 +16,40 @@ function App() {
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
   const [stlUrl, setStlUrl] = useState(null);
+  const finalJobRef = useRef(null);
 
   // Check API health on mount
   useEffect(() => {
     checkHealth();
+    return () => finalJobRef.current?.close();
   }, []);
 
+  // Swap the preview for the print-quality model once its job finishes
+  const followFinalJob = (jobId) => {
+    finalJobRef.current?.close();
+    const events = new EventSource(`${API_BASE_URL}/jobs/${jobId}/events`);
+    finalJobRef.current = events;
+
+    // The preview (and its download) stays in place when the final model fails
+    const keepPreview = () => {
+      events.close();
+      setStatus({ type: 'offline', text: 'Modelo final falhou, prévia disponível' });
+    };
+
+    events.addEventListener('job', (event) => {
+      const job = JSON.parse(event.data);
+      if (job.status === 'done' && job.result?.success) {
+        events.close();
+        setResult(job.result);
+        setStlUrl(`${API_BASE_URL}${job.result.download_url}`);
+        setStatus({ type: 'online', text: 'Modelo Final Pronto!' });
+      } else if (job.status === 'done' || job.status === 'failed') {
+        keepPreview();
+      }
+    });
+    events.onerror = keepPreview;
+  };
+
   const checkHealth = async () => {
     try {
       const response = await fetch(`${API_BASE_URL}/health`);
@@ -41,6 +69,7 @@ function App() {
       return;
     }
 
+    finalJobRef.current?.close();
     setIsLoading(true);
     setError(null);
     setResult(null);
@@ -64,7 +93,12 @@ function App() {
         if (!data.success && data.message) {
           setError(data.message);
         }
-        setStatus({ type: 'online', text: 'Modelo Gerado!' });
+        if (data.final_job_id) {
+          followFinalJob(data.final_job_id);
+          setStatus({ type: 'loading', text: 'Prévia pronta, refinando...' });
+        } else {
+          setStatus({ type: 'online', text: 'Modelo Gerado!' });
+        }
       } else {
         setError(data.detail || 'Erro ao gerar modelo.');
         setStatus({ type: 'offline', text: 'Erro' });
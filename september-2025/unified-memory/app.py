@@ -2,16 +2,24 @@
 API FastAPI para sistema de memória unificada
 """
 from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Optional
+import json
+import os
+import re
 import uvicorn
 
 from models import (
     InteractRequest, InteractResponse, ContextResponse, 
     DeleteMemoryRequest, GCResponse, ClientListResponse, 
-    HealthResponse
+    HealthResponse, RiskPatternsRequest, RiskPatternsResponse,
+    BatchInteractRequest, BatchInteractResponse, BatchInteractResult,
+    ClientStatsResponse, ClientTopicsResponse, ClientHistoryResponse,
+    MemoryMetricsResponse
 )
 from core_memory import MemoryEngine
+from async_engine import AsyncMemoryEngine
+from budget import MemoryBudget
 
 # Inicializa FastAPI
 app = FastAPI(
@@ -20,55 +28,76 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Inicializa motor de memória
-memory_engine = MemoryEngine()
+# Inicializa motor de memória (persistência em background, orçamento global em MB)
+memory_budget = MemoryBudget(int(os.environ.get("MEMORY_BUDGET_MB", "512")) * 1024 * 1024)
+memory_engine = AsyncMemoryEngine(MemoryEngine(write_behind=True, budget=memory_budget))
 
 
-@app.post("/interact", response_model=InteractResponse)
-async def interact(request: InteractRequest):
+@app.on_event("startup")
+async def startup():
+    """
+    Inicia o escritor de memória em background
+    """
+    await memory_engine.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    Grava pendências, snapshot completo e trunca o log de mutações
+    """
+    await memory_engine.stop()
+
+
+@app.post("/interact", response_model=InteractResponse, response_model_exclude_none=True)
+async def interact(
+    request: InteractRequest,
+    debug: bool = Query(False, description="Inclui a latência por etapa (ms)")
+):
     """
     Adiciona nova interação do cliente
     """
     try:
-        event_id, gc_ran = memory_engine.add_interaction(
+        # Evento, contexto e sugestão numa única operação sob o lock do cliente
+        result = await memory_engine.add_interaction(
             client_id=request.client_id,
             channel=request.channel,
-            text=request.text
-        )
-        
-        # Pega dados do evento criado
-        client_data = memory_engine.get_client_data(request.client_id)
-        if not client_data:
-            raise HTTPException(status_code=404, detail="Cliente não encontrado após criação")
-        
-        # Encontra o evento criado
-        created_event = None
-        for interaction in client_data.interactions:
-            if interaction.id == event_id:
-                created_event = interaction
-                break
-        
-        if not created_event:
-            raise HTTPException(status_code=500, detail="Evento não encontrado após criação")
-        
-        # Gera sugestão de resposta
-        assistant_suggestion = memory_engine.generate_assistant_suggestion(
-            request.client_id, 
-            request.channel
+            text=request.text,
+            debug=debug
         )
         
         return InteractResponse(
-            event_id=event_id,
-            risk_score=created_event.risk.score,
-            quarantined=created_event.quarantined,
-            gc_ran=gc_ran,
-            assistant_suggestion=assistant_suggestion
+            event_id=result.interaction.id,
+            risk_score=result.interaction.risk.score,
+            quarantined=result.interaction.quarantined,
+            gc_ran=result.gc_ran,
+            assistant_suggestion=result.assistant_suggestion,
+            timings=result.timings
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao processar interação: {str(e)}")
 
 
+@app.post("/interact/batch", response_model=BatchInteractResponse)
+async def interact_batch(request: BatchInteractRequest):
+    """
+    Adiciona interações em lote (ex.: replay de backlog de canais)
+    """
+    try:
+        results = await memory_engine.add_interactions([
+            (record.client_id, record.channel, record.text)
+            for record in request.records
+        ])
+        
+        return BatchInteractResponse(
+            results=[BatchInteractResult(**result) for result in results]
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao processar lote de interações: {str(e)}")
+
+
 @app.get("/context", response_model=ContextResponse)
 async def get_context(
     client_id: str = Query(..., description="ID do cliente"),
@@ -78,25 +107,25 @@ async def get_context(
     Retorna contexto cruzado entre canais
     """
     try:
-        client_data = memory_engine.get_client_data(client_id)
+        client_data = await memory_engine.get_client_data(client_id)
         if not client_data:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
         
         # Pega contexto de outros canais
-        cross_channel_events = memory_engine.get_cross_channel_context(
+        cross_channel_events = await memory_engine.get_cross_channel_context(
             client_id, 
             current_channel, 
             limit=5
         )
         
         # Gera sugestão de resposta
-        assistant_suggestion = memory_engine.generate_assistant_suggestion(
+        assistant_suggestion = await memory_engine.generate_assistant_suggestion(
             client_id, 
             current_channel
         )
         
         return ContextResponse(
-            state_summary=client_data.state_summary,
+            state_summary=client_data.current_summary(),
             recent_cross_channel=cross_channel_events,
             assistant_suggestion=assistant_suggestion
         )
@@ -121,7 +150,7 @@ async def delete_memory(request: DeleteMemoryRequest):
             raise HTTPException(status_code=400, detail="keys é obrigatório para scope=fields")
         
         # Executa exclusão
-        success = memory_engine.delete_memory(
+        success = await memory_engine.delete_memory(
             client_id=request.client_id,
             scope=request.scope,
             event_id=request.event_id,
@@ -145,11 +174,11 @@ async def force_gc(client_id: str = Query(..., description="ID do cliente")):
     Força execução do garbage collection
     """
     try:
-        client_data = memory_engine.get_client_data(client_id)
+        client_data = await memory_engine.get_client_data(client_id)
         if not client_data:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
         
-        result = memory_engine.run_gc(client_id)
+        result = await memory_engine.run_gc(client_id)
         
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
@@ -162,6 +191,24 @@ async def force_gc(client_id: str = Query(..., description="ID do cliente")):
         raise HTTPException(status_code=500, detail=f"Erro ao executar GC: {str(e)}")
 
 
+@app.get("/stats", response_model=ClientStatsResponse)
+async def get_client_stats(client_id: str = Query(..., description="ID do cliente")):
+    """
+    Retorna totais do cliente (tokens, eventos, quarentena, canais)
+    """
+    try:
+        stats = await memory_engine.get_client_stats(client_id)
+        if stats is None:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        
+        return ClientStatsResponse(**stats)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar estatísticas: {str(e)}")
+
+
 @app.get("/memory/raw")
 async def get_raw_memory(
     include_quarantined: bool = Query(False, description="Incluir eventos quarentenados")
@@ -170,26 +217,119 @@ async def get_raw_memory(
     Retorna memória bruta
     """
     try:
-        raw_data = memory_engine.get_raw_memory(include_quarantined=include_quarantined)
+        raw_data = await memory_engine.get_raw_memory(include_quarantined=include_quarantined)
         return raw_data
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar memória bruta: {str(e)}")
 
 
+@app.get("/memory/export")
+async def export_memory(
+    include_quarantined: bool = Query(False, description="Incluir eventos quarentenados"),
+    prefix: str = Query("", description="Exporta só clientes cujo ID começa com o prefixo"),
+    cursor: Optional[str] = Query(None, description="Último client_id da página anterior"),
+    limit: int = Query(100, ge=1, le=10000, description="Clientes por página")
+):
+    """
+    Exporta a memória em NDJSON (um cliente por linha), paginada por cursor
+    """
+    try:
+        client_ids, next_cursor = await memory_engine.page_client_ids(prefix, cursor, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao exportar memória: {str(e)}")
+
+    async def lines():
+        async for client_id, data in memory_engine.export_clients(client_ids, include_quarantined):
+            yield json.dumps({"client_id": client_id, "data": data}, ensure_ascii=False) + "\n"
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else {}
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
+
+@app.get("/memory/history", response_model=ClientHistoryResponse)
+async def get_memory_history(
+    client_id: str = Query(..., description="ID do cliente"),
+    cursor: int = Query(0, ge=0, description="next_cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=1000, description="Eventos por página")
+):
+    """
+    Eventos brutos que o GC moveu para o arquivo frio (antigos e quarentenados)
+    """
+    try:
+        client_data = await memory_engine.get_client_data(client_id)
+        if not client_data:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        
+        events, next_cursor = await memory_engine.get_history(client_id, cursor, limit)
+        return ClientHistoryResponse(client_id=client_id, events=events, next_cursor=next_cursor)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao ler histórico: {str(e)}")
+
+
+@app.get("/risk/patterns", response_model=RiskPatternsResponse)
+async def get_risk_patterns():
+    """
+    Retorna os padrões de risco ativos
+    """
+    return RiskPatternsResponse(patterns=memory_engine.risk_patterns)
+
+
+@app.put("/risk/patterns", response_model=RiskPatternsResponse)
+async def reload_risk_patterns(request: RiskPatternsRequest):
+    """
+    Recarrega os padrões de risco sem reiniciar a API
+    """
+    try:
+        memory_engine.reload_risk_patterns(request.patterns)
+        return RiskPatternsResponse(patterns=memory_engine.risk_patterns)
+        
+    except re.error as e:
+        raise HTTPException(status_code=400, detail=f"Padrão de risco inválido: {str(e)}")
+
+
 @app.get("/clients", response_model=ClientListResponse)
 async def list_clients():
     """
     Lista todos os clientes
     """
     try:
-        clients = memory_engine.get_all_clients()
+        clients = await memory_engine.get_all_clients()
         return ClientListResponse(clients=clients)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar clientes: {str(e)}")
 
 
+@app.get("/clients/topics", response_model=ClientTopicsResponse)
+async def client_topics(
+    prefix: str = Query("", description="Só clientes cujo ID começa com o prefixo"),
+    cursor: Optional[str] = Query(None, description="Último client_id da página anterior"),
+    limit: int = Query(100, ge=1, le=10000, description="Clientes por página")
+):
+    """
+    Quantas interações de cada cliente mencionam cada tópico, classificadas em lote
+    """
+    try:
+        client_ids, next_cursor = await memory_engine.page_client_ids(prefix, cursor, limit)
+        topics = await memory_engine.get_topic_counts(client_ids)
+        return ClientTopicsResponse(topics=topics, next_cursor=next_cursor)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao contar tópicos: {str(e)}")
+
+
+@app.get("/metrics", response_model=MemoryMetricsResponse)
+async def memory_metrics():
+    """
+    Orçamento global de memória: limite, uso aproximado e clientes liberados
+    """
+    return MemoryMetricsResponse(**memory_engine.memory_metrics())
+
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """
@@ -213,11 +353,19 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /interact": "Adiciona nova interação",
+            "POST /interact/batch": "Adiciona interações em lote",
             "GET /context": "Retorna contexto cruzado",
             "DELETE /memory": "Exclui memória",
             "POST /gc": "Força garbage collection",
+            "GET /stats": "Totais do cliente",
             "GET /memory/raw": "Retorna memória bruta",
+            "GET /memory/export": "Exporta memória em NDJSON paginado",
+            "GET /memory/history": "Histórico arquivado do cliente (paginado)",
+            "GET /risk/patterns": "Lista padrões de risco",
+            "PUT /risk/patterns": "Recarrega padrões de risco",
             "GET /clients": "Lista clientes",
+            "GET /clients/topics": "Tópicos por cliente (em lote)",
+            "GET /metrics": "Orçamento global de memória",
             "GET /health": "Health check"
         }
     }
@@ -0,0 +1,104 @@
+"""
+Arquivo frio: eventos brutos antigos e quarentenados, comprimidos e append-only por cliente
+"""
+import gzip
+import hashlib
+import json
+import os
+import zlib
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class ColdArchive:
+    """
+    Um arquivo JSON Lines comprimido (gzip) por cliente, nome = hash do client_id.
+
+    Cada gravação acrescenta um novo membro gzip ao final do arquivo (o formato
+    permite membros concatenados), então nada já gravado é reescrito. A leitura
+    descomprime em fluxo e para num membro truncado por escrita interrompida.
+    """
+
+    def __init__(self, directory: str = "memory_archive", compresslevel: int = 6):
+        self.directory = directory
+        self.compresslevel = compresslevel
+
+    def _path(self, client_id: str) -> str:
+        digest = hashlib.sha1(client_id.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.jsonl.gz")
+
+    def append(self, client_id: str, records: List[Dict[str, Any]]):
+        """Acrescenta registros ao arquivo do cliente (um membro gzip, um fsync)"""
+        if not records:
+            return
+        lines = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+            for record in records
+        )
+        path = self._path(client_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as f:
+            f.write(gzip.compress(lines.encode('utf-8'), compresslevel=self.compresslevel))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append_many(self, batches: Dict[str, List[Dict[str, Any]]]):
+        """Grava os registros pendentes de vários clientes"""
+        for client_id, records in batches.items():
+            try:
+                self.append(client_id, records)
+            except Exception as e:
+                print(f"Erro ao gravar arquivo frio de {client_id}: {e}")
+
+    def read(self, client_id: str) -> Iterator[Dict[str, Any]]:
+        """Itera os registros do cliente, do mais antigo ao mais recente"""
+        path = self._path(client_id)
+        if not os.path.exists(path):
+            return
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+        except (EOFError, zlib.error, json.JSONDecodeError):
+            # Membro incompleto (escrita interrompida ou em andamento): descarta o restante
+            print(f"Registro truncado ignorado no arquivo frio de {client_id}")
+
+    def page(
+        self,
+        client_id: str,
+        offset: int = 0,
+        limit: int = 100,
+        pending: Iterable[Dict[str, Any]] = ()
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Registros [offset, offset + limit) do arquivo seguido de `pending`
+        (ainda não gravados) e o offset da próxima página (None na última).
+        """
+        records = list(islice(chain(self.read(client_id), pending), offset, offset + limit + 1))
+        if len(records) > limit:
+            return records[:limit], offset + limit
+        return records, None
+
+    def remove_event(self, client_id: str, event_id: str) -> bool:
+        """Reescreve o arquivo sem o evento (exclusão a pedido do cliente)"""
+        records = list(self.read(client_id))
+        kept = [record for record in records if record.get("id") != event_id]
+        if len(kept) == len(records):
+            return False
+
+        path = self._path(client_id)
+        if not kept:
+            os.remove(path)
+            return True
+        tmp_file = f"{path}.tmp"
+        lines = "".join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n" for record in kept)
+        with open(tmp_file, 'wb') as f:
+            f.write(gzip.compress(lines.encode('utf-8'), compresslevel=self.compresslevel))
+        os.replace(tmp_file, path)
+        return True
+
+    def remove_client(self, client_id: str):
+        """Apaga o arquivo do cliente"""
+        path = self._path(client_id)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,245 @@
+"""
+API assíncrona do motor de memória: locks por cliente e escritor em background
+"""
+import asyncio
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from models import ClientData, Interaction, InteractionResult
+from core_memory import MemoryEngine
+
+
+class AsyncMemoryEngine:
+    """
+    Envolve um MemoryEngine em modo write-behind para uso em handlers async.
+
+    As operações rodam no event loop sob um asyncio.Lock por cliente, então
+    mutações de um mesmo cliente são serializadas e clientes diferentes não
+    esperam uns pelos outros. O disco fica fora do loop: clientes fora do cache
+    de backends não residentes (shards, SQLite) são carregados numa thread antes
+    da operação, leituras que varrem o backend rodam numa thread, e a
+    persistência fica com uma task em background que agrupa os clientes sujos e
+    grava o lote (incluindo o índice de clientes dos shards) numa thread.
+    """
+
+    def __init__(self, engine: Optional[MemoryEngine] = None, flush_interval: float = 0.05, max_dirty: int = 500):
+        self.engine = engine or MemoryEngine(write_behind=True)
+        self.engine.write_behind = True
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+
+        # client_id -> [lock, usuários]; removido quando ninguém usa
+        self._locks: Dict[str, list] = {}
+        # Serializa o acesso ao arquivo frio (gravação do escritor, leitura e exclusão)
+        self._archive_lock = asyncio.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.flushes = 0
+        self.clients_written = 0
+
+    @asynccontextmanager
+    async def lock(self, client_id: str):
+        """Serializa operações do cliente (lock criado sob demanda)"""
+        entry = self._locks.get(client_id)
+        if entry is None:
+            entry = self._locks[client_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._locks.pop(client_id, None)
+
+    async def start(self):
+        """Inicia o escritor em background"""
+        if self._writer is None:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._writer = asyncio.create_task(self._writer_loop())
+
+    async def stop(self):
+        """Para o escritor, grava pendências e compacta o backend"""
+        if self._writer is not None:
+            # Deixa o lote em andamento terminar antes da gravação final
+            self._stopping = True
+            self._wake.set()
+            await self._writer
+            self._writer = None
+        await self._load_access_clients()
+        self.engine.flush_access_counts()
+        await self.flush()
+        await asyncio.to_thread(self.engine.compact)
+
+    async def _writer_loop(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Erro no escritor de memória: {e}")
+
+    async def flush(self):
+        """Grava os clientes sujos em um único lote e aplica o orçamento de memória"""
+        await self._load_access_clients()
+        self.engine.maybe_flush_access_counts()
+        if self.engine.dirty_count:
+            await self._write_dirty()
+        # Acima do orçamento: clientes já gravados saem do cache; os compactados vão no próximo lote.
+        # Clientes com lock ficam: a operação em andamento já os carregou fora do loop
+        self.engine.enforce_budget(pinned=set(self._locks))
+
+    async def _write_dirty(self):
+        # Serializa no loop (estado consistente), grava fora dele
+        dirty = self.engine.take_dirty()
+        payload = self.engine.storage.prepare_write(dirty)
+        # Eventos arquivados antes do estado que já não os contém; retirados sob o
+        # lock para que leitura e exclusão nunca vejam registros fora do pendente e do disco
+        async with self._archive_lock:
+            archived = self.engine.take_archive()
+            if archived:
+                await asyncio.to_thread(self.engine.archive.append_many, archived)
+        await asyncio.to_thread(self.engine.storage.commit_write, payload)
+        self.flushes += 1
+        self.clients_written += len(dirty)
+
+    async def _load(self, client_id: str):
+        """Carrega numa thread um cliente que a operação leria do disco"""
+        if self.engine.needs_load(client_id):
+            client = await asyncio.to_thread(self.engine.storage.load_client, client_id)
+            self.engine.adopt_client(client_id, client)
+
+    async def _load_access_clients(self):
+        # Clientes que saíram do cache com acessos pendentes voltam antes do flush
+        for client_id in self.engine.uncached_access_clients():
+            await self._load(client_id)
+
+    def _maybe_wake_writer(self):
+        # Acorda o escritor antes do intervalo se houver muitos clientes sujos
+        if self._wake is not None and self.engine.dirty_count >= self.max_dirty:
+            self._wake.set()
+
+    async def add_interaction(self, client_id: str, channel: str, text: str, debug: bool = False) -> InteractionResult:
+        async with self.lock(client_id):
+            await self._load(client_id)
+            result = self.engine.add_interaction(client_id, channel, text, debug)
+        self._maybe_wake_writer()
+        return result
+
+    async def add_interactions(self, records: List[Tuple[str, str, str]]) -> List[Dict]:
+        # Ordem fixa de aquisição evita deadlock entre lotes concorrentes
+        async with AsyncExitStack() as stack:
+            for client_id in sorted({client_id for client_id, _, _ in records}):
+                await stack.enter_async_context(self.lock(client_id))
+                await self._load(client_id)
+            results = self.engine.add_interactions(records)
+        self._maybe_wake_writer()
+        return results
+
+    async def get_cross_channel_context(self, client_id: str, current_channel: str, limit: int = 5) -> List[Interaction]:
+        async with self.lock(client_id):
+            await self._load(client_id)
+            result = self.engine.get_cross_channel_context(client_id, current_channel, limit)
+        self._maybe_wake_writer()
+        return result
+
+    async def generate_assistant_suggestion(self, client_id: str, current_channel: str) -> str:
+        async with self.lock(client_id):
+            await self._load(client_id)
+            result = self.engine.generate_assistant_suggestion(client_id, current_channel)
+        self._maybe_wake_writer()
+        return result
+
+    async def run_gc(self, client_id: str) -> Dict:
+        async with self.lock(client_id):
+            await self._load(client_id)
+            result = self.engine.run_gc(client_id)
+        self._maybe_wake_writer()
+        return result
+
+    async def delete_memory(self, client_id: str, scope: str, event_id: str = None, keys: List[str] = None) -> bool:
+        async with self.lock(client_id), self._archive_lock:
+            await self._load(client_id)
+            archive_removed = await self._rewrite_archive(client_id, scope, event_id)
+            result = self.engine.delete_memory(client_id, scope, event_id, keys, archive_removed)
+        self._maybe_wake_writer()
+        return result
+
+    async def _rewrite_archive(self, client_id: str, scope: str, event_id: Optional[str]) -> Optional[bool]:
+        """Reescreve o arquivo frio numa thread; None quando a exclusão não o toca"""
+        if self.engine.get_client_data(client_id) is None:
+            return None
+        archive = self.engine.archive
+        if scope == "all":
+            await asyncio.to_thread(archive.remove_client, client_id)
+            return True
+        if scope == "event" and event_id and self.engine.archived_on_disk(client_id, event_id):
+            return await asyncio.to_thread(archive.remove_event, client_id, event_id)
+        return None
+
+    async def get_client_data(self, client_id: str) -> Optional[ClientData]:
+        async with self.lock(client_id):
+            await self._load(client_id)
+            return self.engine.get_client_data(client_id)
+
+    async def get_client_stats(self, client_id: str) -> Optional[Dict]:
+        async with self.lock(client_id):
+            await self._load(client_id)
+            return self.engine.get_client_stats(client_id)
+
+    async def get_history(self, client_id: str, cursor: int = 0, limit: int = 100) -> Tuple[List[Dict], Optional[int]]:
+        """Lê o arquivo frio numa thread (descompressão fora do event loop)"""
+        async with self._archive_lock:
+            return await asyncio.to_thread(self.engine.get_history, client_id, cursor, limit)
+
+    async def get_all_clients(self) -> List[str]:
+        return await asyncio.to_thread(self.engine.get_all_clients)
+
+    async def get_raw_memory(self, include_quarantined: bool = False) -> Dict:
+        client_ids, _ = await self.page_client_ids()
+        return {"clients": {
+            client_id: data async for client_id, data in self.export_clients(client_ids, include_quarantined)
+        }}
+
+    async def page_client_ids(self, prefix: str = "", cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[str], Optional[str]]:
+        return await asyncio.to_thread(self.engine.page_client_ids, prefix, cursor, limit)
+
+    async def _read_client(self, client_id: str, read, *args):
+        """Leitura sem promover no LRU; fora do cache, carrega e lê numa thread"""
+        if self.engine.needs_load(client_id):
+            return await asyncio.to_thread(read, client_id, *args)
+        return read(client_id, *args)
+
+    async def export_clients(self, client_ids: List[str], include_quarantined: bool = False) -> AsyncIterator[Tuple[str, Dict]]:
+        """Exporta um cliente por vez, cada um sob seu lock (dump consistente)"""
+        for client_id in client_ids:
+            async with self.lock(client_id):
+                data = await self._read_client(client_id, self.engine.export_client, include_quarantined)
+            if data is not None:
+                yield client_id, data
+
+    async def get_topic_counts(self, client_ids: List[str]) -> Dict[str, Dict[str, int]]:
+        """Coleta os textos de cada cliente sob seu lock e classifica tudo em um lote"""
+        texts_by_client = {}
+        for client_id in client_ids:
+            async with self.lock(client_id):
+                texts = await self._read_client(client_id, self.engine.topic_texts)
+            if texts is not None:
+                texts_by_client[client_id] = texts
+        return self.engine.count_topics(texts_by_client)
+
+    def memory_metrics(self) -> Dict:
+        return self.engine.memory_metrics()
+
+    @property
+    def risk_patterns(self) -> List[str]:
+        return self.engine.risk_patterns
+
+    def reload_risk_patterns(self, patterns: List[str]):
+        self.engine.reload_risk_patterns(patterns)
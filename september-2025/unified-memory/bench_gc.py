@@ -0,0 +1,102 @@
+"""
+Benchmark do GC: tempo de agrupamento por número de eventos (Jaccard exato vs MinHash/LSH)
+"""
+import random
+import time
+from typing import List
+
+from models import Interaction
+from similarity import MinHashLSH, group_interactions, jaccard, token_set
+
+
+TOPICS = [
+    "quero parcelar minha fatura do cartão em seis vezes",
+    "preciso atualizar meu endereço de cobrança para a rua nova",
+    "qual o status do meu pedido de cancelamento do cartão",
+    "como faço para pagar o boleto com pix hoje",
+    "não consigo acessar o aplicativo desde ontem erro de senha",
+    "gostaria de saber o limite disponível no cartão de crédito",
+    "recebi uma cobrança indevida na fatura deste mês",
+    "quero aumentar o limite do cartão adicional",
+]
+FILLER = "ok obrigado por favor bom dia boa tarde urgente hoje amanhã ainda também".split()
+VOCABULARY = [f"palavra{n}" for n in range(5000)]
+
+
+def make_interactions(count: int) -> List[Interaction]:
+    """Gera eventos sintéticos: 30% variações de poucos tópicos, 70% textos distintos"""
+    interactions = []
+    for n in range(count):
+        if random.random() < 0.3:
+            words = random.choice(TOPICS).split()
+            words = [w for w in words if random.random() > 0.2]
+            words += random.sample(FILLER, random.randint(0, 4))
+        else:
+            words = random.sample(VOCABULARY, random.randint(8, 15))
+        text = " ".join(words)
+        interactions.append(Interaction(
+            id=f"evt_{n:08d}", ts=f"2025-09-26T00:00:{n:08d}Z", channel="chat",
+            text=text, tokens=len(words)
+        ))
+    return interactions
+
+
+def legacy_group(interactions: List[Interaction], threshold: float = 0.3):
+    """Agrupamento original: reconstrói os conjuntos de palavras a cada comparação"""
+    groups = []
+    used = set()
+    for i, interaction in enumerate(interactions):
+        if i in used:
+            continue
+        group = [interaction]
+        used.add(i)
+        for j, other in enumerate(interactions[i + 1:], i + 1):
+            if j in used:
+                continue
+            if jaccard(token_set(interaction.text), token_set(other.text)) >= threshold:
+                group.append(other)
+                used.add(j)
+        groups.append(group)
+    return groups
+
+
+def agreement(groups_a, groups_b) -> float:
+    """Fração de grupos idênticos (pelos IDs) entre dois agrupamentos"""
+    ids_a = {tuple(i.id for i in g) for g in groups_a}
+    ids_b = {tuple(i.id for i in g) for g in groups_b}
+    return len(ids_a & ids_b) / max(len(ids_a), 1)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    random.seed(7)
+    configs = [
+        ("minhash r=2 verify", MinHashLSH(num_perm=64, rows_per_band=2, verify=True)),
+        ("minhash r=2 estimate", MinHashLSH(num_perm=64, rows_per_band=2, verify=False)),
+        ("minhash r=3 verify", MinHashLSH(num_perm=96, rows_per_band=3, verify=True)),
+    ]
+
+    print(f"{'eventos':>8} | {'modo':<22} | {'tempo (ms)':>10} | {'grupos':>6} | {'concordância':>12}")
+    print("-" * 72)
+    for count in (200, 500, 1000, 2000, 5000):
+        interactions = make_interactions(count)
+
+        if count <= 2000:
+            _, legacy_ms = timed(lambda: legacy_group(interactions))
+            print(f"{count:>8} | {'original':<22} | {legacy_ms:>10.1f} | {'':>6} | {'':>12}")
+
+        exact, exact_ms = timed(lambda: group_interactions(interactions))
+        print(f"{count:>8} | {'exact (pré-calculado)':<22} | {exact_ms:>10.1f} | {len(exact):>6} | {1.0:>12.3f}")
+
+        for name, lsh in configs:
+            groups, ms = timed(lambda: group_interactions(interactions, lsh=lsh))
+            print(f"{count:>8} | {name:<22} | {ms:>10.1f} | {len(groups):>6} | {agreement(exact, groups):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Orçamento global de memória: footprint aproximado por cliente e escolha dos mais frios
+"""
+from itertools import groupby
+from typing import Dict, List, Optional
+
+from models import ClientData
+
+
+# Custos aproximados em RAM (medidos com tracemalloc para ClientData com índices e resumo)
+CLIENT_BYTES = 4096
+EVENT_BYTES = 2048
+CHAR_BYTES = 2
+
+
+def estimate_client_bytes(client: ClientData) -> int:
+    """Footprint aproximado do cliente a partir dos totais incrementais (O(1))"""
+    stats = client.stats
+    return CLIENT_BYTES + stats.total_events * EVENT_BYTES + stats.text_chars * CHAR_BYTES
+
+
+class MemoryBudget:
+    """
+    Contabiliza o footprint dos clientes residentes em memória e decide quando
+    liberar: acima de `max_bytes`, o motor compacta (GC) ou descarrega para o
+    disco os clientes mais frios até voltar a `target_ratio` do orçamento.
+
+    O footprint de cada cliente é atualizado a cada mutação persistida, então
+    o total é mantido em O(1) e a verificação de estouro não varre clientes.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, target_ratio: float = 0.9):
+        if not 0 < target_ratio <= 1:
+            raise ValueError(f"target_ratio inválido: {target_ratio}")
+        self.max_bytes = max_bytes
+        self.target_ratio = target_ratio
+        self._footprints: Dict[str, int] = {}
+        self.used_bytes = 0
+        # Após uma liberação que não alcançou a meta, só tenta de novo se o uso crescer
+        self._retry_above = 0
+
+        # Contadores expostos em /metrics
+        self.enforcements = 0
+        self.gc_evictions = 0
+        self.spill_evictions = 0
+        self.bytes_freed = 0
+
+    @property
+    def target_bytes(self) -> Optional[int]:
+        return int(self.max_bytes * self.target_ratio) if self.max_bytes is not None else None
+
+    def needs_release(self) -> bool:
+        """Se o uso passou do orçamento (e cresceu desde a última liberação insuficiente)"""
+        if self.max_bytes is None or self.used_bytes <= self.max_bytes:
+            self._retry_above = 0
+            return False
+        return self.used_bytes > self._retry_above
+
+    def settle(self):
+        """Fim de uma liberação: abaixo da meta, ou espera crescer uma folga antes de tentar de novo"""
+        if self.used_bytes > self.target_bytes:
+            self._retry_above = self.used_bytes + (self.max_bytes - self.target_bytes)
+        else:
+            self._retry_above = 0
+
+    def track(self, client_id: str, client: ClientData):
+        """Registra (ou atualiza) o footprint de um cliente residente"""
+        footprint = estimate_client_bytes(client)
+        self.used_bytes += footprint - self._footprints.get(client_id, 0)
+        self._footprints[client_id] = footprint
+
+    def untrack(self, client_id: str) -> int:
+        """Remove o cliente da contabilidade (descarregado ou excluído)"""
+        footprint = self._footprints.pop(client_id, 0)
+        self.used_bytes -= footprint
+        return footprint
+
+    def footprint(self, client_id: str) -> int:
+        return self._footprints.get(client_id, 0)
+
+    def client_ids(self) -> List[str]:
+        """Clientes residentes contabilizados"""
+        return list(self._footprints)
+
+    def coldest(self, clients: Dict[str, ClientData]) -> List[str]:
+        """
+        Clientes do mais frio ao mais quente: última atualização do perfil mais
+        antiga primeiro e, no empate, menos acessos.
+        """
+        def updated_at(client_id: str) -> str:
+            return clients[client_id].profile.updated_at
+
+        def accesses(client_id: str) -> int:
+            return sum(i.access_count for i in clients[client_id].interactions)
+
+        # Acessos só são somados para desempatar timestamps iguais
+        ranked: List[str] = []
+        for _, tied in groupby(sorted(clients, key=updated_at), key=updated_at):
+            tied = list(tied)
+            ranked.extend(sorted(tied, key=accesses) if len(tied) > 1 else tied)
+        return ranked
+
+    def stats(self) -> Dict:
+        return {
+            "max_bytes": self.max_bytes,
+            "target_bytes": self.target_bytes,
+            "used_bytes": self.used_bytes,
+            "tracked_clients": len(self._footprints),
+            "enforcements": self.enforcements,
+            "gc_evictions": self.gc_evictions,
+            "spill_evictions": self.spill_evictions,
+            "bytes_freed": self.bytes_freed
+        }
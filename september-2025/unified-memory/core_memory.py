@@ -1,60 +1,339 @@
 """
 Motor de memória unificada com GC, detecção de risco e handoff entre canais
 """
-import json
-import os
-import re
+import time
 import uuid
+from bisect import bisect_right
 from datetime import datetime, timezone
-from typing import List, Dict, Set, Tuple, Optional
-from collections import Counter
+from typing import Collection, List, Dict, Set, Tuple, Optional, Iterator, FrozenSet
+from collections import Counter, OrderedDict
+
+import numpy as np
 
 from models import (
-    MemoryData, ClientData, Interaction, RiskAssessment, 
-    ClientProfile, ClientLimits, ClientMeta
+    ClientData, Interaction, RiskAssessment, 
+    ClientProfile, ClientLimits, ClientMeta, InteractionResult
 )
+from storage import MemoryStorage, SnapshotStorage
+from archive import ColdArchive
+from budget import MemoryBudget
+from risk_scanner import RiskScanner, DEFAULT_RISK_PATTERNS
+from similarity import MinHashLSH, group_interactions, jaccard, token_set
+from topics import TopicClassifier
+
+
+class StageTimer:
+    """Cronometra etapas consecutivas em ms (desativado, não mede nada)"""
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages: Dict[str, float] = {}
+        self._last = time.perf_counter() if enabled else 0.0
+    
+    def lap(self, stage: str):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.stages[stage] = round((now - self._last) * 1000, 3)
+        self._last = now
 
 
 class MemoryEngine:
     """Motor principal de memória unificada"""
     
-    def __init__(self, memory_file: str = "memory.json"):
+    def __init__(
+        self,
+        memory_file: str = "memory.json",
+        persistence: str = "wal",
+        snapshot_every: int = 1000,
+        storage: Optional[MemoryStorage] = None,
+        max_cached_clients: int = 1000,
+        gc_clustering: str = "exact",
+        lsh: Optional[MinHashLSH] = None,
+        write_behind: bool = False,
+        access_flush_interval: float = 5.0,
+        access_flush_threshold: int = 1000,
+        archive: Optional[ColdArchive] = None,
+        budget: Optional[MemoryBudget] = None
+    ):
         self.memory_file = memory_file
-        self.memory_data = self._load_memory()
+        
+        # Backend de armazenamento (padrão: snapshot JSON único + log de mutações)
+        self.storage = storage or SnapshotStorage(memory_file, persistence, snapshot_every)
+        
+        # Arquivo frio: eventos brutos antigos e quarentenados que o GC tira da memória
+        self.archive = archive or ColdArchive(f"{memory_file}.archive")
+        self._archive_pending: Dict[str, List[Dict]] = {}
+        
+        # LRU de clientes quentes (carregados sob demanda)
+        self.max_cached_clients = max_cached_clients
+        self._clients: "OrderedDict[str, ClientData]" = OrderedDict()
+        # Clientes que uma leitura feita fora do motor já viu que não existem
+        self._known_absent: Set[str] = set()
+        
+        # Write-behind: mutações só marcam o cliente como sujo; um escritor em
+        # background (AsyncMemoryEngine) grava os clientes sujos em lote
+        self.write_behind = write_behind
+        self._dirty: Set[str] = set()
+        
+        # Buffer de access_count: leituras não gravam; incrementos são aplicados
+        # e persistidos em lote (periodicamente, antes do GC e no shutdown)
+        self.access_flush_interval = access_flush_interval
+        self.access_flush_threshold = access_flush_threshold
+        self._access_buffer: Dict[str, Counter] = {}
+        self._access_pending = 0
+        self._access_flushed_at = time.monotonic()
+        
+        # Agrupamento do GC: "exact" (Jaccard par a par) ou "minhash" (MinHash/LSH)
+        if gc_clustering not in ("exact", "minhash"):
+            raise ValueError(f"Modo de agrupamento inválido: {gc_clustering}")
+        self.gc_clustering = gc_clustering
+        self.lsh = (lsh or MinHashLSH()) if gc_clustering == "minhash" else None
         
         # Padrões para detecção de jailbreak/ataques
-        self.risk_patterns = [
-            r"ignore\s+previous\s+instructions",
-            r"act\s+as\s+(system|developer|root)",
-            r"begin_system_instructions",
-            r"developer\s+mode",
-            r"bypass\s+(safeguards|policies)",
-            r"jailbreak",
-            r"leak\s+(api|secret|key|password)",
-            r"credit\s+card\s+(number|details|cvv)",
-            r"cpf\s+completo",
-            r"senha\s+do\s+banco"
-        ]
-        
-    def _load_memory(self) -> MemoryData:
-        """Carrega memória do arquivo JSON"""
-        if os.path.exists(self.memory_file):
-            try:
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return MemoryData(**data)
-            except Exception as e:
-                print(f"Erro ao carregar memória: {e}")
-                return MemoryData()
-        return MemoryData()
-    
-    def _save_memory(self):
-        """Salva memória no arquivo JSON"""
-        try:
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump(self.memory_data.model_dump(), f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Erro ao salvar memória: {e}")
+        self.risk_patterns = list(DEFAULT_RISK_PATTERNS)
+        self.risk_scanner = RiskScanner(self.risk_patterns)
+        
+        # Tópicos e intenções das sugestões (compilados uma vez)
+        self.topic_classifier = TopicClassifier()
+        
+        # Orçamento global de memória (sem limite por padrão)
+        self.budget = budget or MemoryBudget()
+        if self.storage.resident:
+            # Backend carregado por inteiro: todos os clientes já ocupam memória
+            for client_id in self.storage.list_clients():
+                self.budget.track(client_id, self.storage.load_client(client_id))
+        
+    def _get_client(self, client_id: str) -> Optional[ClientData]:
+        """Retorna cliente do cache LRU, carregando do backend no primeiro acesso"""
+        client = self._clients.get(client_id)
+        if client is not None:
+            self._clients.move_to_end(client_id)
+            return client
+        if client_id in self._known_absent:
+            self._known_absent.discard(client_id)
+            return None
+        
+        client = self.storage.load_client(client_id)
+        if client is not None:
+            self._cache_client(client_id, client)
+        return client
+    
+    def _cache_client(self, client_id: str, client: ClientData):
+        """Insere cliente no cache e descarta os menos usados além do limite"""
+        self._clients[client_id] = client
+        self._clients.move_to_end(client_id)
+        self._known_absent.discard(client_id)
+        self.budget.track(client_id, client)
+        if len(self._clients) <= self.max_cached_clients:
+            return
+        
+        # Descarta os menos usados; clientes sujos ficam até serem gravados
+        for cached_id in list(self._clients):
+            if len(self._clients) <= self.max_cached_clients:
+                break
+            if cached_id not in self._dirty and cached_id != client_id:
+                self._evict_client(cached_id)
+    
+    def needs_load(self, client_id: str) -> bool:
+        """Se acessar o cliente leria o backend (fora do cache, backend não residente)"""
+        return client_id not in self._clients and not self.storage.resident
+    
+    def adopt_client(self, client_id: str, client: Optional[ClientData]):
+        """Põe no cache um cliente carregado fora do motor (ex.: numa thread)"""
+        if client is None:
+            self._known_absent.add(client_id)
+        elif client_id not in self._clients:
+            self._cache_client(client_id, client)
+    
+    def _evict_client(self, client_id: str):
+        """Tira o cliente do cache (só libera memória se o backend não for residente)"""
+        del self._clients[client_id]
+        if not self.storage.resident:
+            self.budget.untrack(client_id)
+    
+    def _persist(self, op: str, client_id: str, **payload):
+        """Persiste uma mutação do cliente no backend (ou marca como sujo)"""
+        self._persist_many([(op, client_id, payload)])
+    
+    def _persist_many(self, mutations: List[Tuple[str, str, Dict]]):
+        """Persiste várias mutações (op, client_id, payload) numa única gravação do backend"""
+        records = []
+        for op, client_id, payload in mutations:
+            # Toda mutação passa por aqui: atualiza o footprint do cliente
+            client = self._clients.get(client_id)
+            if client is not None:
+                self.budget.track(client_id, client)
+            elif op == "delete_client":
+                self.budget.untrack(client_id)
+            
+            if self.write_behind:
+                self._dirty.add(client_id)
+            else:
+                records.append((op, client_id, client, payload))
+        
+        if records:
+            self.storage.record_many(records)
+            # Gravados: podem voltar a sair do LRU
+            self._dirty.difference_update(client_id for _, client_id, _, _ in records)
+    
+    def take_dirty(self) -> Dict[str, Optional[ClientData]]:
+        """Retorna e limpa os clientes sujos (None = cliente excluído)"""
+        dirty = {client_id: self._clients.get(client_id) for client_id in self._dirty}
+        self._dirty = set()
+        return dirty
+    
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+    
+    def _archive_events(self, client_id: str, events: List[Interaction]):
+        """Move eventos para o arquivo frio (em write-behind, gravados pelo escritor)"""
+        if not events:
+            return
+        archived_at = self._get_current_timestamp()
+        records = [{**event.model_dump(), "archived_at": archived_at} for event in events]
+        if self.write_behind:
+            self._archive_pending.setdefault(client_id, []).extend(records)
+            return
+        self.archive.append(client_id, records)
+    
+    def take_archive(self) -> Dict[str, List[Dict]]:
+        """Retorna e limpa os registros pendentes do arquivo frio"""
+        pending = self._archive_pending
+        self._archive_pending = {}
+        return pending
+    
+    def archived_on_disk(self, client_id: str, event_id: str) -> bool:
+        """Se o evento só pode estar no arquivo frio já gravado (nem ativo nem pendente)"""
+        client = self._clients.get(client_id)
+        if client is not None and any(i.id == event_id for i in client.interactions):
+            return False
+        return all(record["id"] != event_id for record in self._archive_pending.get(client_id, ()))
+    
+    def get_history(self, client_id: str, cursor: int = 0, limit: int = 100) -> Tuple[List[Dict], Optional[int]]:
+        """Página de eventos arquivados do cliente (arquivo frio + pendentes de gravação)"""
+        pending = list(self._archive_pending.get(client_id, ()))
+        return self.archive.page(client_id, cursor, limit, pending)
+    
+    def _persist_client(self, client_id: str):
+        """Persiste o estado completo de um cliente (GC, exclusão de campos)"""
+        self._persist("client", client_id)
+    
+    def _buffer_access(self, client_id: str, events: List[Interaction], flush: bool = True):
+        """Acumula incrementos de access_count sem tocar o disco"""
+        counts = self._access_buffer.setdefault(client_id, Counter())
+        for event in events:
+            counts[event.id] += 1
+        self._access_pending += len(events)
+        
+        if self.write_behind or not flush:
+            # O escritor em background chama maybe_flush_access_counts
+            return
+        self.maybe_flush_access_counts()
+    
+    def _merge_access_counts(self, client_id: str, client: ClientData) -> Dict[str, int]:
+        """Aplica ao cliente os incrementos pendentes do buffer"""
+        counts = self._access_buffer.pop(client_id, None)
+        if not counts:
+            return {}
+        self._access_pending -= sum(counts.values())
+        
+        applied = {}
+        for interaction in client.interactions:
+            increment = counts.get(interaction.id)
+            if increment:
+                interaction.access_count += increment
+                applied[interaction.id] = increment
+        return applied
+    
+    def uncached_access_clients(self) -> List[str]:
+        """Clientes com incrementos pendentes cujo flush leria o backend"""
+        return [client_id for client_id in self._access_buffer if self.needs_load(client_id)]
+    
+    def maybe_flush_access_counts(self):
+        """Descarrega o buffer se passou o intervalo ou o limite de incrementos"""
+        if not self._access_pending:
+            return
+        elapsed = time.monotonic() - self._access_flushed_at
+        if elapsed >= self.access_flush_interval or self._access_pending >= self.access_flush_threshold:
+            self.flush_access_counts()
+    
+    def flush_access_counts(self):
+        """Aplica e persiste todos os incrementos de access_count pendentes"""
+        for client_id in list(self._access_buffer):
+            client = self._get_client(client_id)
+            if client is None:
+                self._access_pending -= sum(self._access_buffer.pop(client_id).values())
+                continue
+            applied = self._merge_access_counts(client_id, client)
+            if applied:
+                self._persist("access", client_id, counts=applied)
+        self._access_flushed_at = time.monotonic()
+    
+    def enforce_budget(self, pinned: Collection[str] = ()) -> int:
+        """
+        Acima do orçamento global, libera memória dos clientes mais frios até
+        voltar à meta: descarrega para o disco (cliente gravado e backend não
+        residente) ou compacta com GC. Clientes em `pinned` (em uso por uma
+        operação em andamento) ficam para a próxima verificação. Retorna o
+        número de clientes liberados.
+        """
+        budget = self.budget
+        if not budget.needs_release():
+            return 0
+        budget.enforcements += 1
+        
+        resident = {
+            client_id: self._clients.get(client_id) or self.storage.load_client(client_id)
+            for client_id in budget.client_ids()
+        }
+        released = 0
+        deferred = False
+        for client_id in budget.coldest({cid: c for cid, c in resident.items() if c is not None}):
+            if budget.used_bytes <= budget.target_bytes:
+                break
+            if client_id in pinned:
+                deferred = True
+                continue
+            before = budget.footprint(client_id)
+            client = resident[client_id]
+            
+            if not self.storage.resident and client_id in self._clients and client_id not in self._dirty:
+                self._evict_client(client_id)
+                budget.spill_evictions += 1
+                released += 1
+            else:
+                # Backend residente ou cliente sujo: só o GC libera agora (o sujo
+                # pode ser descarregado depois que o escritor gravar)
+                deferred = deferred or (not self.storage.resident and client_id in self._dirty)
+                if not self._compactable(client):
+                    continue
+                self._compact_client(client_id)
+                self._persist_client(client_id)
+                budget.gc_evictions += 1
+                released += 1
+            
+            budget.bytes_freed += before - budget.footprint(client_id)
+        
+        if not deferred:
+            budget.settle()
+        return released
+    
+    def _compactable(self, client: ClientData) -> bool:
+        """Se o GC tiraria algo da memória (brutos fora da janela quente ou quarentenados)"""
+        stats = client.stats
+        raw_events = stats.total_events - stats.quarantined - stats.channels.get("memory", 0)
+        return raw_events > 10 or stats.quarantined > 0
+    
+    def memory_metrics(self) -> Dict:
+        """Orçamento, uso aproximado e contadores de liberação"""
+        return {**self.budget.stats(), "cached_clients": len(self._clients)}
+    
+    def compact(self):
+        """Grava pendências do backend (snapshot completo e truncamento do log)"""
+        self.flush_access_counts()
+        self.storage.flush()
     
     def _get_current_timestamp(self) -> str:
         """Retorna timestamp atual em UTC ISO-8601"""
@@ -66,71 +345,20 @@ class MemoryEngine:
     
     def _assess_risk(self, text: str) -> RiskAssessment:
         """Avalia risco de jailbreak/ataque no texto"""
-        score = 0
-        signals = []
-        
-        text_lower = text.lower()
-        
-        # Verifica padrões de risco
-        for pattern in self.risk_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                score += 25
-                signals.append(f"Padrão suspeito: {pattern}")
-        
-        # Texto muito longo
-        if len(text) > 2000:
-            score += 15
-            signals.append("Texto excessivamente longo")
-        
-        # Densidade anômala de palavras-chave
-        system_count = text_lower.count('system')
-        backtick_count = text.count('```')
-        if system_count > 3 or backtick_count > 5:
-            score += 10
-            signals.append("Densidade anômala de palavras-chave técnicas")
-        
-        # Limita score a 100
-        score = min(score, 100)
-        
-        return RiskAssessment(score=score, signals=signals)
+        return self.risk_scanner.scan(text)
+    
+    def reload_risk_patterns(self, patterns: List[str]):
+        """Recompila os padrões de risco sem reiniciar (re.error se inválidos)"""
+        self.risk_scanner.load(patterns)
+        self.risk_patterns = list(patterns)
     
     def _jaccard_similarity(self, text1: str, text2: str) -> float:
         """Calcula similaridade Jaccard entre dois textos"""
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        
-        if not words1 and not words2:
-            return 1.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union) if union else 0.0
+        return jaccard(token_set(text1), token_set(text2))
     
     def _group_similar_interactions(self, interactions: List[Interaction], threshold: float = 0.3) -> List[List[Interaction]]:
-        """Agrupa interações similares usando Jaccard"""
-        groups = []
-        used = set()
-        
-        for i, interaction in enumerate(interactions):
-            if i in used:
-                continue
-                
-            group = [interaction]
-            used.add(i)
-            
-            for j, other in enumerate(interactions[i+1:], i+1):
-                if j in used:
-                    continue
-                    
-                similarity = self._jaccard_similarity(interaction.text, other.text)
-                if similarity >= threshold:
-                    group.append(other)
-                    used.add(j)
-            
-            groups.append(group)
-        
-        return groups
+        """Agrupa interações similares usando Jaccard (exato ou MinHash/LSH)"""
+        return group_interactions(interactions, threshold, self.lsh)
     
     def _create_summary_from_group(self, group: List[Interaction]) -> str:
         """Cria resumo de um grupo de interações similares"""
@@ -149,51 +377,19 @@ class MemoryEngine:
         
         return f"Múltiplas interações sobre: {', '.join(top_words)} (canais: {', '.join(channels)})"
     
-    def _update_state_summary(self, client_id: str):
-        """Atualiza resumo do estado do cliente"""
-        if client_id not in self.memory_data.clients:
-            return
-        
-        client = self.memory_data.clients[client_id]
-        
-        # Pega últimas 10 interações não quarentenadas
-        recent_interactions = [
-            i for i in client.interactions[-10:] 
-            if not i.quarantined and i.channel != "memory"
-        ]
-        
-        if not recent_interactions:
-            client.state_summary = "Nenhuma interação recente disponível."
-            return
-        
-        # Extrai temas principais das interações recentes
-        all_text = " ".join([i.text for i in recent_interactions])
-        words = all_text.lower().split()
-        word_counts = Counter(words)
-        
-        # Remove palavras muito comuns
-        stop_words = {"o", "a", "de", "do", "da", "em", "um", "uma", "para", "com", "não", "que", "se", "por", "mais", "como", "mas", "foi", "ao", "ele", "das", "tem", "à", "seu", "sua", "ou", "ser", "quando", "muito", "há", "nos", "já", "está", "eu", "também", "só", "pelo", "pela", "até", "isso", "ela", "entre", "era", "depois", "sem", "mesmo", "aos", "ter", "seus", "suas", "numa", "pelos", "pelas", "esse", "esses", "pelas", "essa", "essas", "dele", "deles", "desta", "deste", "nesta", "neste", "nessa", "nesse", "numa", "nuns", "umas", "pelos", "pelas"}
-        
-        relevant_words = [
-            word for word, count in word_counts.most_common(10) 
-            if word not in stop_words and len(word) > 2
-        ]
-        
-        channels_used = list(set(i.channel for i in recent_interactions))
-        
-        client.state_summary = f"Cliente interagiu via {', '.join(channels_used)} sobre: {', '.join(relevant_words[:5])}."
-    
-    def add_interaction(self, client_id: str, channel: str, text: str) -> Tuple[str, bool]:
-        """Adiciona nova interação e retorna (event_id, gc_ran)"""
-        # Cria cliente se não existir
-        if client_id not in self.memory_data.clients:
-            self.memory_data.clients[client_id] = ClientData(
+    def _get_or_create_client(self, client_id: str) -> ClientData:
+        """Retorna cliente, criando-o se não existir"""
+        client = self._get_client(client_id)
+        if client is None:
+            client = ClientData(
                 profile=ClientProfile(updated_at=self._get_current_timestamp())
             )
-        
-        client = self.memory_data.clients[client_id]
-        
-        # Cria evento
+            self.storage.add_client(client_id, client)
+            self._cache_client(client_id, client)
+        return client
+    
+    def _append_interaction(self, client: ClientData, channel: str, text: str) -> Interaction:
+        """Cria evento com avaliação de risco e o adiciona ao cliente"""
         event_id = f"evt_{uuid.uuid4().hex[:8]}"
         risk = self._assess_risk(text)
         
@@ -208,7 +404,7 @@ class MemoryEngine:
         )
         
         # Adiciona à lista
-        client.interactions.append(interaction)
+        client.add_interaction(interaction)
         
         # Atualiza canais
         if channel not in client.channels:
@@ -217,55 +413,137 @@ class MemoryEngine:
         # Atualiza perfil
         client.profile.updated_at = self._get_current_timestamp()
         
-        # Verifica se precisa de GC
-        gc_ran = self._maybe_run_gc(client_id)
+        return interaction
+    
+    def add_interaction(self, client_id: str, channel: str, text: str, debug: bool = False) -> InteractionResult:
+        """
+        Adiciona nova interação e retorna o evento criado, o contexto de outros
+        canais e a sugestão de resposta, calculados sobre o mesmo estado.
+        Uma única gravação por chamada; com debug, inclui a latência por etapa.
+        """
+        timer = StageTimer(debug)
         
-        # Atualiza resumo
-        self._update_state_summary(client_id)
+        # Cria cliente se não existir
+        client = self._get_or_create_client(client_id)
         
-        # Salva
-        self._save_memory()
+        # Cria evento
+        interaction = self._append_interaction(client, channel, text)
+        timer.lap("append")
         
-        return event_id, gc_ran
+        # Verifica se precisa de GC
+        gc_ran = self._maybe_run_gc(client_id)
+        timer.lap("gc")
+        
+        # Contexto e sugestão (os acessos vão para o buffer, sem gravar agora)
+        cross_channel = client.latest_events([channel, "memory"], 3)
+        if cross_channel:
+            self._buffer_access(client_id, cross_channel, flush=False)
+        timer.lap("context")
+        suggestion = self._suggest(client, channel, cross_channel)
+        timer.lap("suggestion")
+        
+        # Salva (após GC o cliente inteiro mudou)
+        if gc_ran:
+            self._persist_client(client_id)
+        else:
+            self._persist(
+                "add", client_id,
+                interaction=interaction.model_dump(),
+                updated_at=client.profile.updated_at
+            )
+        timer.lap("persist")
+        
+        # Orçamento global (em write-behind, verificado pelo escritor em background)
+        if not self.write_behind:
+            self.enforce_budget()
+        
+        return InteractionResult(
+            interaction=interaction,
+            gc_ran=gc_ran,
+            cross_channel=cross_channel,
+            assistant_suggestion=suggestion,
+            timings=timer.stages if debug else None
+        )
+    
+    def add_interactions(self, records: List[Tuple[str, str, str]]) -> List[Dict]:
+        """
+        Adiciona interações em lote: (client_id, channel, text) por registro.
+        GC, resumo e persistência rodam uma vez por cliente no lote.
+        Retorna um resultado por registro, na ordem de entrada.
+        """
+        results: List[Dict] = [None] * len(records)
+        
+        # Agrupa por cliente preservando a ordem de chegada
+        by_client: Dict[str, List[int]] = {}
+        for index, (client_id, _, _) in enumerate(records):
+            by_client.setdefault(client_id, []).append(index)
+        
+        # Processa um cliente por vez; as mutações são gravadas juntas no fim do lote
+        mutations: List[Tuple[str, str, Dict]] = []
+        for client_id, indexes in by_client.items():
+            client = self._get_or_create_client(client_id)
+            
+            interactions = []
+            for index in indexes:
+                _, channel, text = records[index]
+                interactions.append(self._append_interaction(client, channel, text))
+            
+            # Verifica se precisa de GC
+            gc_ran = self._maybe_run_gc(client_id)
+            
+            # Sujo até a gravação no fim do lote (clientes sujos não saem do LRU)
+            self._dirty.add(client_id)
+            
+            # Uma mutação por cliente (após GC o cliente inteiro mudou)
+            if gc_ran:
+                mutations.append(("client", client_id, {}))
+            else:
+                mutations.append(("add_batch", client_id, {
+                    "interactions": [i.model_dump() for i in interactions],
+                    "updated_at": client.profile.updated_at
+                }))
+            
+            for index, interaction in zip(indexes, interactions):
+                results[index] = {
+                    "client_id": client_id,
+                    "event_id": interaction.id,
+                    "risk_score": interaction.risk.score,
+                    "quarantined": interaction.quarantined,
+                    "gc_ran": gc_ran
+                }
+        
+        # Uma única gravação (e um fsync no log) para o lote inteiro
+        self._persist_many(mutations)
+        
+        if not self.write_behind:
+            self.enforce_budget()
+        
+        return results
     
     def get_cross_channel_context(self, client_id: str, current_channel: str, limit: int = 5) -> List[Interaction]:
         """Retorna contexto de outros canais"""
-        if client_id not in self.memory_data.clients:
+        client = self._get_client(client_id)
+        if client is None:
             return []
         
-        client = self.memory_data.clients[client_id]
-        
-        # Filtra eventos de outros canais, não quarentenados
-        other_channel_events = [
-            i for i in client.interactions 
-            if i.channel != current_channel and not i.quarantined and i.channel != "memory"
-        ]
-        
-        # Ordena por timestamp (mais recentes primeiro)
-        other_channel_events.sort(key=lambda x: x.ts, reverse=True)
-        
-        # Pega os mais recentes
-        recent_events = other_channel_events[:limit]
-        
-        # Incrementa access_count
-        for event in recent_events:
-            event.access_count += 1
+        # Eventos mais recentes de outros canais, não quarentenados (índice por canal)
+        recent_events = client.latest_events([current_channel, "memory"], limit)
         
+        # Incrementa access_count (bufferizado: a leitura não grava em disco)
         if recent_events:
-            self._save_memory()
+            self._buffer_access(client_id, recent_events)
         
         return recent_events
     
     def _maybe_run_gc(self, client_id: str) -> bool:
         """Executa GC se necessário"""
-        if client_id not in self.memory_data.clients:
+        client = self._get_client(client_id)
+        if client is None:
             return False
         
-        client = self.memory_data.clients[client_id]
-        
-        # Calcula totais
-        total_tokens = sum(i.tokens for i in client.interactions)
-        total_events = len(client.interactions)
+        # Totais mantidos incrementalmente (O(1))
+        total_tokens = client.stats.total_tokens
+        total_events = client.stats.total_events
         
         # Verifica se precisa de GC
         needs_gc = (
@@ -274,148 +552,285 @@ class MemoryEngine:
         )
         
         if needs_gc:
-            return self.run_gc(client_id)
+            self._compact_client(client_id)
+            return True
         
         return False
     
     def run_gc(self, client_id: str) -> Dict:
         """Executa garbage collection"""
-        if client_id not in self.memory_data.clients:
+        if self._get_client(client_id) is None:
             return {"error": "Cliente não encontrado"}
         
-        client = self.memory_data.clients[client_id]
+        result = self._compact_client(client_id)
+        
+        # Salva
+        self._persist_client(client_id)
+        
+        return result
+    
+    def _compact_client(self, client_id: str) -> Dict:
+        """Compacta as interações de um cliente (sem persistir)"""
+        client = self._get_client(client_id)
+        
+        # GC precisa dos access_count atualizados (persistidos junto com o cliente)
+        self._merge_access_counts(client_id, client)
         
         # Estatísticas antes
-        events_before = len(client.interactions)
-        tokens_before = sum(i.tokens for i in client.interactions)
+        events_before = client.stats.total_events
+        tokens_before = client.stats.total_tokens
         
         # Separa eventos quarentenados e normais
         quarantined = [i for i in client.interactions if i.quarantined]
         normal = [i for i in client.interactions if not i.quarantined]
         
-        # Mantém últimos 10 eventos normais
+        # Camada quente: últimos 10 eventos normais
         keep_recent = normal[-10:] if len(normal) > 10 else normal
         old_events = normal[:-10] if len(normal) > 10 else []
         
-        # Agrupa eventos antigos por similaridade
-        if old_events:
-            groups = self._group_similar_interactions(old_events)
-            
-            # Cria eventos sintéticos para cada grupo
-            synthetic_events = []
-            for group in groups:
-                if len(group) > 1:
-                    # Cria evento sintético
-                    summary_text = self._create_summary_from_group(group)
-                    synthetic_event = Interaction(
-                        id=f"mem_{uuid.uuid4().hex[:8]}",
-                        ts=self._get_current_timestamp(),
-                        channel="memory",
-                        text=summary_text,
-                        tokens=self._count_tokens(summary_text),
-                        access_count=sum(i.access_count for i in group),
-                        risk=RiskAssessment(score=0, signals=[]),
-                        quarantined=False
-                    )
-                    synthetic_events.append(synthetic_event)
-                else:
-                    # Mantém evento único
-                    synthetic_events.append(group[0])
-            
-            # Nova lista: eventos sintéticos + recentes + quarentenados
-            client.interactions = synthetic_events + keep_recent + quarantined
-        else:
-            # Só mantém recentes + quarentenados
-            client.interactions = keep_recent + quarantined
-        
-        # Atualiza resumo
-        self._update_state_summary(client_id)
-        
-        # Atualiza timestamp do GC
+        # Camada morna: resumos sintéticos; os eventos brutos antigos vão para o arquivo frio
+        warm_events = [i for i in old_events if i.channel == "memory"]
+        raw_events = [i for i in old_events if i.channel != "memory"]
+        
+        # Agrupa eventos brutos antigos por similaridade (um resumo por grupo)
+        if raw_events:
+            for group in self._group_similar_interactions(raw_events):
+                summary_text = self._create_summary_from_group(group)
+                warm_events.append(Interaction(
+                    id=f"mem_{uuid.uuid4().hex[:8]}",
+                    ts=self._get_current_timestamp(),
+                    channel="memory",
+                    text=summary_text,
+                    tokens=self._count_tokens(summary_text),
+                    access_count=sum(i.access_count for i in group),
+                    risk=RiskAssessment(score=0, signals=[]),
+                    quarantined=False
+                ))
+        
+        # Resumos mais antigos saem da memória (os eventos de origem estão no arquivo)
+        max_warm = client.limits.max_warm_events
+        if len(warm_events) > max_warm:
+            warm_events = warm_events[len(warm_events) - max_warm:]
+        
+        # Brutos antigos e quarentenados: arquivo frio, em ordem cronológica
+        archived = sorted(raw_events + quarantined, key=lambda i: i.ts)
+        self._archive_events(client_id, archived)
+        client.meta.archived_events += len(archived)
+        
+        # Nova lista: resumos sintéticos + recentes
+        client.replace_interactions(warm_events + keep_recent)
+        
+        # Atualiza timestamp do GC (o resumo é regenerado na próxima leitura)
         client.limits.last_gc_at = self._get_current_timestamp()
         
         # Estatísticas depois
-        events_after = len(client.interactions)
-        tokens_after = sum(i.tokens for i in client.interactions)
-        
-        # Salva
-        self._save_memory()
+        events_after = client.stats.total_events
+        tokens_after = client.stats.total_tokens
         
         return {
             "events_before": events_before,
             "events_after": events_after,
             "tokens_before": tokens_before,
             "tokens_after": tokens_after,
-            "summary_updated": True
+            "summary_updated": True,
+            "events_archived": len(archived)
         }
     
-    def delete_memory(self, client_id: str, scope: str, event_id: str = None, keys: List[str] = None) -> bool:
-        """Exclui memória conforme escopo"""
-        if client_id not in self.memory_data.clients:
+    def delete_memory(
+        self,
+        client_id: str,
+        scope: str,
+        event_id: str = None,
+        keys: List[str] = None,
+        archive_removed: Optional[bool] = None
+    ) -> bool:
+        """
+        Exclui memória conforme escopo.
+
+        `archive_removed` é o resultado da reescrita do arquivo frio quando o
+        chamador já a fez (fora do event loop); com None o motor reescreve.
+        """
+        client = self._get_client(client_id)
+        if client is None:
             return False
         
-        client = self.memory_data.clients[client_id]
-        
         if scope == "all":
             # Remove cliente completamente
-            del self.memory_data.clients[client_id]
+            self.storage.remove_client(client_id)
+            self._clients.pop(client_id, None)
+            self._archive_pending.pop(client_id, None)
+            if archive_removed is None:
+                self.archive.remove_client(client_id)
+            self._access_pending -= sum(self._access_buffer.pop(client_id, Counter()).values())
+            self._persist("delete_client", client_id)
+            return True
         
-        elif scope == "event" and event_id:
-            # Remove evento específico
-            client.interactions = [i for i in client.interactions if i.id != event_id]
-            self._update_state_summary(client_id)
+        # Atualiza meta
+        client.meta.last_delete = self._get_current_timestamp()
         
-        elif scope == "fields" and keys:
-            # Remove campos do perfil
-            profile_dict = client.profile.model_dump()
-            for key in keys:
-                if key in profile_dict:
-                    setattr(client.profile, key, None)
-            client.profile.updated_at = self._get_current_timestamp()
+        if scope == "event" and event_id:
+            # Remove evento específico
+            if client.remove_interaction(event_id) is not None:
+                self._persist(
+                    "delete_event", client_id,
+                    event_id=event_id,
+                    last_delete=client.meta.last_delete
+                )
+            else:
+                # Evento arquivado: o contador do arquivo vai no estado completo
+                self._remove_archived_event(client_id, client, event_id, archive_removed)
+                self._persist_client(client_id)
         
-        # Atualiza meta
-        if client_id in self.memory_data.clients:
-            self.memory_data.clients[client_id].meta.last_delete = self._get_current_timestamp()
+        else:
+            if scope == "fields" and keys:
+                # Remove campos do perfil
+                profile_dict = client.profile.model_dump()
+                for key in keys:
+                    if key in profile_dict:
+                        setattr(client.profile, key, None)
+                client.profile.updated_at = self._get_current_timestamp()
+            self._persist_client(client_id)
         
-        self._save_memory()
         return True
     
+    def _remove_archived_event(self, client_id: str, client: ClientData, event_id: str, archive_removed: Optional[bool] = None):
+        """Exclui um evento arquivado (pendente de gravação ou já no arquivo frio)"""
+        pending = self._archive_pending.get(client_id, [])
+        kept = [record for record in pending if record["id"] != event_id]
+        removed = len(pending) - len(kept)
+        if removed:
+            self._archive_pending[client_id] = kept
+        elif archive_removed if archive_removed is not None else self.archive.remove_event(client_id, event_id):
+            removed = 1
+        client.meta.archived_events = max(0, client.meta.archived_events - removed)
+    
     def get_client_data(self, client_id: str) -> Optional[ClientData]:
         """Retorna dados do cliente"""
-        return self.memory_data.clients.get(client_id)
+        return self._get_client(client_id)
+    
+    def get_client_stats(self, client_id: str) -> Optional[Dict]:
+        """Retorna totais do cliente (mantidos incrementalmente)"""
+        client = self._get_client(client_id)
+        if client is None:
+            return None
+        
+        return {
+            "client_id": client_id,
+            **client.stats.model_dump(),
+            "max_tokens": client.limits.max_tokens,
+            "max_events": client.limits.max_events,
+            "last_gc_at": client.limits.last_gc_at,
+            "archived_events": client.meta.archived_events
+        }
     
     def get_all_clients(self) -> List[str]:
-        """Retorna lista de todos os clientes"""
-        return list(self.memory_data.clients.keys())
+        """Retorna lista de todos os clientes (sem carregar interações)"""
+        return self.storage.list_clients()
+    
+    def _dump_client(self, client: ClientData, include_quarantined: bool) -> Dict:
+        """Serializa um cliente, omitindo quarentenados sem copiar o modelo"""
+        if include_quarantined:
+            return client.model_dump()
+        quarantined = {i for i, event in enumerate(client.interactions) if event.quarantined}
+        if not quarantined:
+            return client.model_dump()
+        return client.model_dump(exclude={"interactions": quarantined})
+    
+    def page_client_ids(
+        self,
+        prefix: str = "",
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Página de IDs em ordem lexicográfica: IDs com `prefix` maiores que `cursor`.
+        Retorna os IDs e o cursor da próxima página (None na última).
+        """
+        client_ids = sorted(cid for cid in self.storage.list_clients() if cid.startswith(prefix))
+        start = bisect_right(client_ids, cursor) if cursor is not None else 0
+        
+        if limit is None or start + limit >= len(client_ids):
+            return client_ids[start:], None
+        page = client_ids[start:start + limit]
+        return page, page[-1]
+    
+    def export_client(self, client_id: str, include_quarantined: bool = False) -> Optional[Dict]:
+        """Dump de um cliente para exportação (None se não existir mais)"""
+        # Não promove no LRU: exportação não indica clientes quentes
+        client = self._clients.get(client_id) or self.storage.load_client(client_id)
+        if client is None:
+            return None
+        return self._dump_client(client, include_quarantined)
+    
+    def topic_texts(self, client_id: str) -> Optional[List[str]]:
+        """Textos não quarentenados do cliente, para análise de tópicos (sem promover no LRU)"""
+        client = self._clients.get(client_id) or self.storage.load_client(client_id)
+        if client is None:
+            return None
+        return [event.text for event in client.interactions if not event.quarantined]
+    
+    def count_topics(self, texts_by_client: Dict[str, List[str]]) -> Dict[str, Dict[str, int]]:
+        """
+        Interações que mencionam cada tópico, por cliente: todos os textos
+        são classificados em um único lote e somados por cliente.
+        """
+        client_ids = list(texts_by_client)
+        texts = [text for client_id in client_ids for text in texts_by_client[client_id]]
+        owners = np.repeat(np.arange(len(client_ids)), [len(texts_by_client[cid]) for cid in client_ids])
+        
+        mentions = (self.topic_classifier.score_batch(texts) > 0).astype(np.int64)
+        totals = np.zeros((len(client_ids), mentions.shape[1]), dtype=np.int64)
+        np.add.at(totals, owners, mentions)
+        
+        names = self.topic_classifier.topic_names
+        return {
+            client_id: {name: int(count) for name, count in zip(names, row) if count}
+            for client_id, row in zip(client_ids, totals)
+        }
+    
+    def get_topic_counts(self, client_ids: List[str]) -> Dict[str, Dict[str, int]]:
+        """Contagem de tópicos dos clientes informados (ignora os que não existem)"""
+        texts_by_client = {}
+        for client_id in client_ids:
+            texts = self.topic_texts(client_id)
+            if texts is not None:
+                texts_by_client[client_id] = texts
+        return self.count_topics(texts_by_client)
+    
+    def iter_raw_memory(
+        self,
+        include_quarantined: bool = False,
+        prefix: str = "",
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[Tuple[str, Dict]]:
+        """Itera (client_id, dump) um cliente por vez"""
+        client_ids, _ = self.page_client_ids(prefix, cursor, limit)
+        for client_id in client_ids:
+            data = self.export_client(client_id, include_quarantined)
+            if data is not None:
+                yield client_id, data
     
     def get_raw_memory(self, include_quarantined: bool = False) -> Dict:
         """Retorna memória bruta"""
-        if include_quarantined:
-            return self.memory_data.model_dump()
-        
-        # Filtra quarentenados
-        filtered_data = self.memory_data.model_copy(deep=True)
-        for client_id, client in filtered_data.clients.items():
-            client.interactions = [i for i in client.interactions if not i.quarantined]
-        
-        return filtered_data.model_dump()
+        return {"clients": dict(self.iter_raw_memory(include_quarantined))}
     
     def generate_assistant_suggestion(self, client_id: str, current_channel: str) -> str:
         """Gera sugestão de resposta contextualizada e natural"""
-        if client_id not in self.memory_data.clients:
+        client = self._get_client(client_id)
+        if client is None:
             return "Olá! Como posso ajudá-lo hoje?"
         
-        client = self.memory_data.clients[client_id]
-        
-        # Pega última interação do canal atual
-        current_channel_interactions = [
-            i for i in client.interactions 
-            if i.channel == current_channel and not i.quarantined
-        ]
-        
         # Contexto de outros canais
         cross_channel = self.get_cross_channel_context(client_id, current_channel, 3)
         
+        return self._suggest(client, current_channel, cross_channel)
+    
+    def _suggest(self, client: ClientData, current_channel: str, cross_channel: List[Interaction]) -> str:
+        """Sugestão a partir do canal atual e do contexto de outros canais já calculado"""
+        # Pega última interação do canal atual
+        current_channel_interactions = client.channel_events(current_channel)
+        
         # Mapeia canais para nomes mais naturais
         channel_names = {
             "chat": "chat do site",
@@ -456,28 +871,12 @@ class MemoryEngine:
         
         return suggestion
     
-    def _extract_main_topics(self, interactions: List[Interaction]) -> str:
-        """Extrai tópicos principais das interações de forma mais inteligente"""
-        if not interactions:
+    def _extract_main_topics(self, interactions: List[Interaction], hits: FrozenSet[str] = frozenset()) -> str:
+        """Extrai tópicos principais das interações (classificador compilado, uma varredura por texto)"""
+        if not interactions and not hits:
             return "suas solicitações"
         
-        # Palavras-chave por categoria
-        topics_map = {
-            "parcelamento": ["parcelar", "parcela", "parcelamento", "dividir", "prestação"],
-            "endereço": ["endereço", "endereco", "mudança", "mudar", "atualizar", "rua", "cep"],
-            "cartão": ["cartão", "cartao", "card", "fatura", "conta"],
-            "pagamento": ["pagar", "pagamento", "boleto", "pix", "transferência"],
-            "cancelamento": ["cancelar", "cancelamento", "encerrar", "desativar"],
-            "dúvidas": ["dúvida", "duvida", "informação", "saber", "como", "quando"],
-            "problema": ["problema", "erro", "não", "nao", "conseguir", "dificuldade"]
-        }
-        
-        all_text = " ".join([i.text.lower() for i in interactions])
-        detected_topics = []
-        
-        for topic, keywords in topics_map.items():
-            if any(keyword in all_text for keyword in keywords):
-                detected_topics.append(topic)
+        detected_topics = self.topic_classifier.classify((i.text for i in interactions), hits)
         
         if not detected_topics:
             return "suas solicitações"
@@ -490,37 +889,39 @@ class MemoryEngine:
     
     def _generate_contextual_response(self, last_interaction: Interaction, cross_channel: List[Interaction], current_channel_name: str) -> str:
         """Gera resposta contextual baseada no tipo de mensagem"""
-        text = last_interaction.text.lower()
+        # Palavras-chave de intenções e tópicos da mensagem, em uma varredura
+        hits = self.topic_classifier.match(last_interaction.text)
+        intents = self.topic_classifier.intents(hits)
         
         # Detecta tipo de mensagem
-        if any(word in text for word in ["obrigado", "obrigada", "valeu", "agradeço"]):
+        if "agradecimento" in intents:
             if cross_channel:
                 return "Fico feliz em poder ajudar! Se precisar de mais alguma coisa relacionada ao que conversamos anteriormente, estarei aqui."
             else:
                 return "Por nada! Fico feliz em ajudar. Se tiver mais alguma dúvida, é só falar."
         
-        elif any(word in text for word in ["tchau", "até", "falou", "bye"]):
+        elif "despedida" in intents:
             return "Até mais! Qualquer coisa, pode entrar em contato novamente. Tenha um ótimo dia!"
         
-        elif "?" in text or any(word in text for word in ["como", "quando", "onde", "qual", "que", "posso", "consigo"]):
+        elif "?" in last_interaction.text or "pergunta" in intents:
             # É uma pergunta
-            topics = self._extract_main_topics([last_interaction] + cross_channel)
+            topics = self._extract_main_topics(cross_channel, hits)
             
             if cross_channel:
                 return f"Perfeito! Vou ajudar você com essa dúvida sobre {topics}. Já tenho o contexto das nossas conversas anteriores, então posso dar uma resposta mais completa."
             else:
                 return f"Claro! Vou esclarecer sua dúvida sobre {topics}. Me dê um momento para verificar as informações mais atualizadas."
         
-        elif any(word in text for word in ["problema", "erro", "não consegui", "dificuldade", "ajuda"]):
+        elif "problema" in intents:
             # É um problema
             if cross_channel:
                 return "Entendi o problema. Vou analisar junto com o histórico das nossas conversas para encontrar a melhor solução. Me dê um momento."
             else:
                 return "Compreendo a situação. Vou verificar o que pode estar acontecendo e te ajudar a resolver isso."
         
-        elif any(word in text for word in ["quero", "preciso", "gostaria", "solicitar"]):
+        elif "solicitação" in intents:
             # É uma solicitação
-            topics = self._extract_main_topics([last_interaction] + cross_channel)
+            topics = self._extract_main_topics(cross_channel, hits)
             
             if cross_channel:
                 return f"Entendi sua solicitação sobre {topics}. Como já temos um histórico, posso agilizar o processo. Vou verificar o que precisa ser feito."
@@ -223,6 +223,11 @@ class MemorySystemDemo:
             print(f"🔤 Tokens antes: {response['tokens_before']}")
             print(f"🔤 Tokens depois: {response['tokens_after']}")
             print(f"📝 Resumo atualizado: {response['summary_updated']}")
+            print(f"🗄️ Eventos arquivados: {response.get('events_archived', 0)}")
+        
+        history = self._make_request("GET", "/memory/history", params={"client_id": self.client_id, "limit": 5})
+        for event in history.get("events", []):
+            print(f"  🗄️ [{event['channel']}] {event['text'][:50]}... (arquivado em {event['archived_at']})")
         
         return response
     
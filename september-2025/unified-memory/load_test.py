@@ -0,0 +1,110 @@
+"""
+Teste de carga: throughput com clientes concorrentes
+
+Modo local (padrão): compara, no mesmo processo, o motor síncrono chamado de
+handlers async (persistência bloqueante a cada mutação) com o AsyncMemoryEngine
+(locks por cliente + escritor em background).
+
+Modo HTTP: dispara requisições contra uma API em execução.
+    python load_test.py --url http://localhost:8000 --clients 50 --requests 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core_memory import MemoryEngine
+from async_engine import AsyncMemoryEngine
+
+
+CHANNELS = ["chat", "email", "voice", "whatsapp"]
+MESSAGES = [
+    "Quero parcelar minha fatura do cartão em 6 vezes.",
+    "Preciso atualizar meu endereço de cobrança.",
+    "Qual o status do meu parcelamento?",
+    "Como faço para pagar o boleto com pix?",
+    "Não consigo acessar o aplicativo desde ontem.",
+]
+
+
+async def run_sync_engine(engine: MemoryEngine, clients: int, requests: int) -> int:
+    """Handlers async chamando o motor síncrono diretamente (comportamento antigo)"""
+    async def client_session(client_id: str):
+        for _ in range(requests):
+            channel = random.choice(CHANNELS)
+            engine.add_interaction(client_id, channel, random.choice(MESSAGES))
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(client_session(f"LOAD{n}") for n in range(clients)))
+    return clients * requests
+
+
+async def run_async_engine(engine: AsyncMemoryEngine, clients: int, requests: int) -> int:
+    """Handlers async usando o AsyncMemoryEngine"""
+    async def client_session(client_id: str):
+        for _ in range(requests):
+            channel = random.choice(CHANNELS)
+            await engine.add_interaction(client_id, channel, random.choice(MESSAGES))
+
+    await engine.start()
+    await asyncio.gather(*(client_session(f"LOAD{n}") for n in range(clients)))
+    await engine.stop()
+    return clients * requests
+
+
+def run_local(clients: int, requests: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_engine = MemoryEngine(os.path.join(tmp, "sync.json"))
+        start = time.perf_counter()
+        total = asyncio.run(run_sync_engine(sync_engine, clients, requests))
+        sync_elapsed = time.perf_counter() - start
+
+        async_engine = AsyncMemoryEngine(
+            MemoryEngine(os.path.join(tmp, "async.json"), write_behind=True)
+        )
+        start = time.perf_counter()
+        asyncio.run(run_async_engine(async_engine, clients, requests))
+        async_elapsed = time.perf_counter() - start
+
+    print(f"Clientes concorrentes: {clients} | requisições por cliente: {requests}")
+    print(f"  síncrono:   {total / sync_elapsed:>8.0f} req/s ({sync_elapsed:.2f}s)")
+    print(f"  assíncrono: {total / async_elapsed:>8.0f} req/s ({async_elapsed:.2f}s, "
+          f"{async_engine.flushes} lotes gravados)")
+    print(f"  ganho:      {sync_elapsed / async_elapsed:>8.1f}x")
+
+
+def run_http(url: str, clients: int, requests: int):
+    import requests as http
+
+    def client_session(n: int):
+        session = http.Session()
+        client_id = f"LOAD{n}"
+        for _ in range(requests):
+            channel = random.choice(CHANNELS)
+            session.post(f"{url}/interact", json={
+                "client_id": client_id, "channel": channel, "text": random.choice(MESSAGES)
+            }).raise_for_status()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client_session, range(clients)))
+    elapsed = time.perf_counter() - start
+    total = clients * requests
+    print(f"{url}: {total} requisições de {clients} clientes em {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga do sistema de memória")
+    parser.add_argument("--url", help="URL da API (omita para o modo local)")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(3)
+    if args.url:
+        run_http(args.url, args.clients, args.requests)
+    else:
+        run_local(args.clients, args.requests)
@@ -0,0 +1,170 @@
+"""
+Log append-only de mutações (write-ahead log) para persistência incremental da memória
+"""
+import json
+import os
+from typing import Dict, List, Any, Iterator
+
+from models import MemoryData, ClientData, ClientProfile, Interaction
+
+
+class MemoryLog:
+    """
+    Write-ahead log em JSON Lines: uma mutação por linha.
+
+    Cada registro leva um número de sequência crescente (`seq`) e o snapshot
+    guarda o último que contém (`MemoryData.wal_seq`). Assim, se o processo
+    cair entre gravar o snapshot e truncar o log, a reaplicação ignora os
+    registros que o snapshot já contém em vez de duplicá-los.
+    """
+
+    def __init__(self, log_file: str):
+        self.log_file = log_file
+        self.records = self._count_records()
+        # Último número de sequência atribuído (retomado em replay)
+        self.seq = 0
+
+    def _count_records(self) -> int:
+        """Conta registros pendentes no log (desde o último snapshot)"""
+        if not os.path.exists(self.log_file):
+            return 0
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+
+    def append(self, op: str, client_id: str, **payload: Any):
+        """Acrescenta uma mutação ao final do log"""
+        self.append_many([{"op": op, "client_id": client_id, **payload}])
+
+    def append_many(self, records: List[Dict[str, Any]]):
+        """Acrescenta várias mutações com uma única escrita e um único fsync"""
+        if not records:
+            return
+        first = self.seq + 1
+        self.seq += len(records)
+        lines = "".join(
+            json.dumps({**record, "seq": seq}, ensure_ascii=False, separators=(',', ':')) + "\n"
+            for seq, record in enumerate(records, first)
+        )
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.records += len(records)
+
+    def read(self) -> Iterator[Dict[str, Any]]:
+        """Itera sobre os registros do log, parando numa linha final truncada"""
+        # Fim do último registro válido (em bytes) e se o log termina numa linha truncada
+        self.valid_bytes = 0
+        self.torn = False
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, 'rb') as f:
+            for raw in f:
+                line = raw.strip()
+                if line:
+                    try:
+                        record = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        # Escrita interrompida no meio: descarta o restante
+                        print(f"Registro corrompido ignorado em {self.log_file}")
+                        self.torn = True
+                        return
+                    self.valid_bytes += len(raw)
+                    yield record
+                else:
+                    self.valid_bytes += len(raw)
+
+    def replay(self, memory_data: MemoryData) -> int:
+        """Reaplica os registros do log sobre o snapshot carregado e repara o final do log"""
+        applied = 0
+        self.seq = memory_data.wal_seq
+        for record in self.read():
+            seq = record.get("seq")
+            if seq is not None:
+                # Já contido no snapshot (queda antes do truncamento do log)
+                if seq <= memory_data.wal_seq:
+                    continue
+                self.seq = max(self.seq, seq)
+            try:
+                apply_record(memory_data, record)
+                applied += 1
+            except Exception as e:
+                print(f"Erro ao reaplicar registro {record.get('op')}: {e}")
+        self._repair()
+        return applied
+
+    def _repair(self):
+        """
+        Corta o log no fim do último registro válido, para que as próximas
+        gravações não fiquem depois (ou coladas) de uma linha truncada.
+        """
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, 'r+b') as f:
+            if self.torn:
+                f.truncate(self.valid_bytes)
+            # Último registro válido sem quebra de linha: completa a linha
+            if self.valid_bytes:
+                f.seek(self.valid_bytes - 1)
+                if f.read(1) != b"\n":
+                    f.seek(self.valid_bytes)
+                    f.write(b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.records = self._count_records()
+
+    def truncate(self):
+        """Descarta o log após um snapshot completo"""
+        with open(self.log_file, 'w', encoding='utf-8'):
+            pass
+        self.records = 0
+
+
+def apply_record(memory_data: MemoryData, record: Dict[str, Any]):
+    """Aplica uma mutação do log sobre a memória"""
+    op = record["op"]
+    client_id = record["client_id"]
+    clients = memory_data.clients
+
+    if op in ("add", "add_batch"):
+        # Interação(ões) adicionada(s) (sem GC)
+        if client_id not in clients:
+            clients[client_id] = ClientData(
+                profile=ClientProfile(updated_at=record["updated_at"])
+            )
+        client = clients[client_id]
+        added = record["interactions"] if op == "add_batch" else [record["interaction"]]
+        for data in added:
+            interaction = Interaction(**data)
+            client.add_interaction(interaction)
+            if interaction.channel not in client.channels:
+                client.channels.append(interaction.channel)
+        client.profile.updated_at = record["updated_at"]
+        # state_summary é derivado das interações (regenerado na leitura)
+
+    elif op == "access":
+        # Incrementos de access_count
+        client = clients.get(client_id)
+        if client is None:
+            return
+        counts = record["counts"]
+        for interaction in client.interactions:
+            if interaction.id in counts:
+                interaction.access_count += counts[interaction.id]
+
+    elif op == "delete_event":
+        client = clients.get(client_id)
+        if client is None:
+            return
+        client.remove_interaction(record["event_id"])
+        client.meta.last_delete = record["last_delete"]
+
+    elif op == "delete_client":
+        clients.pop(client_id, None)
+
+    elif op == "client":
+        # Estado completo do cliente (GC, exclusão de campos)
+        clients[client_id] = ClientData(**record["data"])
+
+    else:
+        raise ValueError(f"Operação desconhecida: {op}")
@@ -1,10 +1,14 @@
 """
 Modelos Pydantic para o sistema de memória unificada
 """
+import heapq
+from itertools import islice
 from typing import List, Optional, Dict, Any, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, model_serializer
 from datetime import datetime
 
+from summary import SummaryWindow
+
 
 class RiskAssessment(BaseModel):
     """Avaliação de risco de jailbreak/ataque"""
@@ -37,6 +41,7 @@ class ClientLimits(BaseModel):
     """Limites para garbage collection"""
     max_tokens: int = Field(default=2500, description="Máximo de tokens antes do GC")
     max_events: int = Field(default=200, description="Máximo de eventos antes do GC")
+    max_warm_events: int = Field(default=50, description="Máximo de resumos sintéticos mantidos em memória")
     last_gc_at: Optional[str] = Field(default=None, description="Último GC executado")
 
 
@@ -44,6 +49,36 @@ class ClientMeta(BaseModel):
     """Metadados do cliente"""
     version: int = Field(default=1, description="Versão do esquema")
     last_delete: Optional[str] = Field(default=None, description="Último delete executado")
+    archived_events: int = Field(default=0, description="Eventos movidos para o arquivo frio")
+
+
+class ClientStats(BaseModel):
+    """Totais do cliente mantidos incrementalmente (não persistidos)"""
+    total_tokens: int = Field(default=0, description="Soma de tokens das interações")
+    total_events: int = Field(default=0, description="Número de interações")
+    quarantined: int = Field(default=0, description="Número de interações quarentenadas")
+    channels: Dict[str, int] = Field(default_factory=dict, description="Interações por canal")
+    text_chars: int = Field(default=0, description="Soma de caracteres dos textos")
+    
+    def add(self, interaction: "Interaction"):
+        """Contabiliza uma interação adicionada"""
+        self.total_tokens += interaction.tokens
+        self.total_events += 1
+        self.quarantined += interaction.quarantined
+        self.text_chars += len(interaction.text)
+        self.channels[interaction.channel] = self.channels.get(interaction.channel, 0) + 1
+    
+    def remove(self, interaction: "Interaction"):
+        """Desconta uma interação removida"""
+        self.total_tokens -= interaction.tokens
+        self.total_events -= 1
+        self.quarantined -= interaction.quarantined
+        self.text_chars -= len(interaction.text)
+        remaining = self.channels.get(interaction.channel, 0) - 1
+        if remaining > 0:
+            self.channels[interaction.channel] = remaining
+        else:
+            self.channels.pop(interaction.channel, None)
 
 
 class ClientData(BaseModel):
@@ -54,11 +89,136 @@ class ClientData(BaseModel):
     interactions: List[Interaction] = Field(default_factory=list)
     limits: ClientLimits = Field(default_factory=ClientLimits)
     meta: ClientMeta = Field(default_factory=ClientMeta)
+    
+    _stats: ClientStats = PrivateAttr(default_factory=ClientStats)
+    # Índice secundário: canal -> eventos não quarentenados ordenados por ts
+    _channel_index: Dict[str, List[Interaction]] = PrivateAttr(default_factory=dict)
+    # Janela de palavras do resumo; o texto só é regenerado quando lido
+    _summary: SummaryWindow = PrivateAttr(default_factory=SummaryWindow)
+    _summary_stale: bool = PrivateAttr(default=False)
+    
+    def model_post_init(self, __context: Any):
+        # Carregado do disco: recalcula totais e índice uma única vez
+        self.recount_stats()
+    
+    @model_serializer(mode="wrap")
+    def _serialize(self, handler):
+        # Toda serialização (gravação, exportação, API) vê o resumo atualizado
+        self.current_summary()
+        return handler(self)
+    
+    def current_summary(self) -> str:
+        """Resumo do estado, regenerado só se a janela mudou desde a última leitura"""
+        if self._summary_stale:
+            self.state_summary = self._summary.render()
+            self._summary_stale = False
+        return self.state_summary
+    
+    @property
+    def stats(self) -> ClientStats:
+        """Totais atuais (O(1))"""
+        return self._stats
+    
+    def recount_stats(self):
+        """Recalcula os totais e o índice por canal a partir das interações"""
+        stats = ClientStats()
+        channel_index: Dict[str, List[Interaction]] = {}
+        for interaction in self.interactions:
+            stats.add(interaction)
+            if not interaction.quarantined:
+                channel_index.setdefault(interaction.channel, []).append(interaction)
+        for events in channel_index.values():
+            events.sort(key=lambda i: i.ts)
+        self._stats = stats
+        self._channel_index = channel_index
+        self._reset_summary()
+    
+    def _reset_summary(self):
+        """Recalcula a janela do resumo a partir das últimas interações"""
+        window = self._summary
+        window.reset([(i.channel, i.text, i.quarantined) for i in self.interactions[-window.size:]])
+    
+    def _index_add(self, interaction: Interaction):
+        if interaction.quarantined:
+            return
+        events = self._channel_index.setdefault(interaction.channel, [])
+        if not events or events[-1].ts <= interaction.ts:
+            events.append(interaction)
+        else:
+            # Fora de ordem (raro): insere na posição do timestamp
+            position = len(events)
+            while position > 0 and events[position - 1].ts > interaction.ts:
+                position -= 1
+            events.insert(position, interaction)
+    
+    def _index_remove(self, interaction: Interaction):
+        events = self._channel_index.get(interaction.channel)
+        if not events:
+            return
+        for index in range(len(events) - 1, -1, -1):
+            if events[index] is interaction:
+                del events[index]
+                break
+        if not events:
+            del self._channel_index[interaction.channel]
+    
+    def add_interaction(self, interaction: Interaction):
+        """Adiciona interação atualizando totais e índice"""
+        self.interactions.append(interaction)
+        self._stats.add(interaction)
+        self._index_add(interaction)
+        self._summary.push(interaction.channel, interaction.text, interaction.quarantined)
+        self._summary_stale = True
+    
+    def remove_interaction(self, event_id: str) -> Optional[Interaction]:
+        """Remove interação pelo ID atualizando totais e índice"""
+        for index, interaction in enumerate(self.interactions):
+            if interaction.id == event_id:
+                del self.interactions[index]
+                self._stats.remove(interaction)
+                self._index_remove(interaction)
+                self._reset_summary()
+                self._summary_stale = True
+                return interaction
+        return None
+    
+    def channel_events(self, channel: str) -> List[Interaction]:
+        """Eventos não quarentenados do canal, do mais antigo ao mais recente"""
+        return self._channel_index.get(channel, [])
+    
+    def latest_events(self, exclude_channels: List[str], limit: int) -> List[Interaction]:
+        """Últimos `limit` eventos não quarentenados fora dos canais excluídos (merge k-way)"""
+        if limit <= 0:
+            return []
+        tails = [
+            reversed(events[-limit:])
+            for channel, events in self._channel_index.items()
+            if channel not in exclude_channels
+        ]
+        merged = heapq.merge(*tails, key=lambda i: i.ts, reverse=True)
+        return list(islice(merged, limit))
+    
+    def replace_interactions(self, interactions: List[Interaction]):
+        """Substitui a lista de interações (compactação) e recalcula os totais"""
+        self.interactions = interactions
+        self.recount_stats()
+        self._summary_stale = True
 
 
 class MemoryData(BaseModel):
     """Estrutura completa da memória"""
     clients: Dict[str, ClientData] = Field(default_factory=dict)
+    # Último registro do log de mutações já contido no snapshot
+    wal_seq: int = 0
+
+
+class InteractionResult(BaseModel):
+    """Resultado de add_interaction: evento, contexto e sugestão do mesmo estado"""
+    interaction: Interaction = Field(description="Evento criado")
+    gc_ran: bool = Field(description="Se o GC foi executado")
+    cross_channel: List[Interaction] = Field(default_factory=list, description="Contexto de outros canais usado na sugestão")
+    assistant_suggestion: str = Field(description="Sugestão de resposta contextualizada")
+    timings: Optional[Dict[str, float]] = Field(default=None, description="Latência por etapa em ms (modo debug)")
 
 
 # Request/Response models para API
@@ -76,6 +236,26 @@ class InteractResponse(BaseModel):
     quarantined: bool = Field(description="Se foi quarentenado")
     gc_ran: bool = Field(description="Se o GC foi executado")
     assistant_suggestion: str = Field(description="Sugestão de resposta contextualizada")
+    timings: Optional[Dict[str, float]] = Field(default=None, description="Latência por etapa em ms (só com debug=true)")
+
+
+class BatchInteractRequest(BaseModel):
+    """Request para ingestão de interações em lote"""
+    records: List[InteractRequest] = Field(max_length=1000, description="Interações a adicionar, em ordem (máx: 1000)")
+
+
+class BatchInteractResult(BaseModel):
+    """Resultado de uma interação do lote"""
+    client_id: str = Field(description="ID do cliente")
+    event_id: str = Field(description="ID do evento criado")
+    risk_score: int = Field(description="Score de risco detectado")
+    quarantined: bool = Field(description="Se foi quarentenado")
+    gc_ran: bool = Field(description="Se o GC foi executado para o cliente no lote")
+
+
+class BatchInteractResponse(BaseModel):
+    """Response da ingestão em lote"""
+    results: List[BatchInteractResult] = Field(description="Um resultado por registro, na ordem do request")
 
 
 class ContextResponse(BaseModel):
@@ -100,6 +280,55 @@ class GCResponse(BaseModel):
     tokens_before: int = Field(description="Tokens antes do GC")
     tokens_after: int = Field(description="Tokens após o GC")
     summary_updated: bool = Field(description="Se o resumo foi atualizado")
+    events_archived: int = Field(default=0, description="Eventos movidos para o arquivo frio")
+
+
+class RiskPatternsRequest(BaseModel):
+    """Request para recarga dos padrões de risco"""
+    patterns: List[str] = Field(description="Expressões regulares de risco")
+
+
+class RiskPatternsResponse(BaseModel):
+    """Response com os padrões de risco ativos"""
+    patterns: List[str] = Field(description="Expressões regulares de risco ativas")
+
+
+class ClientStatsResponse(BaseModel):
+    """Response das estatísticas do cliente"""
+    client_id: str = Field(description="ID do cliente")
+    total_tokens: int = Field(description="Soma de tokens das interações")
+    total_events: int = Field(description="Número de interações")
+    quarantined: int = Field(description="Número de interações quarentenadas")
+    channels: Dict[str, int] = Field(description="Interações por canal")
+    max_tokens: int = Field(description="Limite de tokens antes do GC")
+    max_events: int = Field(description="Limite de eventos antes do GC")
+    last_gc_at: Optional[str] = Field(default=None, description="Último GC executado")
+    archived_events: int = Field(default=0, description="Eventos no arquivo frio")
+
+
+class ArchivedInteraction(Interaction):
+    """Evento bruto lido do arquivo frio"""
+    archived_at: str = Field(description="Timestamp UTC ISO-8601 do arquivamento")
+
+
+class ClientHistoryResponse(BaseModel):
+    """Response do histórico arquivado do cliente"""
+    client_id: str = Field(description="ID do cliente")
+    events: List[ArchivedInteraction] = Field(description="Eventos arquivados, do mais antigo ao mais recente")
+    next_cursor: Optional[int] = Field(default=None, description="Cursor da próxima página (None na última)")
+
+
+class MemoryMetricsResponse(BaseModel):
+    """Response das métricas do orçamento global de memória"""
+    max_bytes: Optional[int] = Field(default=None, description="Orçamento global (None = sem limite)")
+    target_bytes: Optional[int] = Field(default=None, description="Uso alvo após liberar memória")
+    used_bytes: int = Field(description="Footprint aproximado dos clientes residentes")
+    tracked_clients: int = Field(description="Clientes residentes contabilizados")
+    cached_clients: int = Field(description="Clientes no cache LRU do motor")
+    enforcements: int = Field(description="Vezes em que o orçamento foi excedido")
+    gc_evictions: int = Field(description="Clientes compactados pelo orçamento")
+    spill_evictions: int = Field(description="Clientes descarregados para o disco pelo orçamento")
+    bytes_freed: int = Field(description="Bytes aproximados liberados pelo orçamento")
 
 
 class ClientListResponse(BaseModel):
@@ -107,6 +336,12 @@ class ClientListResponse(BaseModel):
     clients: List[str] = Field(description="Lista de IDs de clientes")
 
 
+class ClientTopicsResponse(BaseModel):
+    """Response da contagem de tópicos por cliente"""
+    topics: Dict[str, Dict[str, int]] = Field(description="Interações que mencionam cada tópico, por cliente")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor da próxima página (None na última)")
+
+
 class HealthResponse(BaseModel):
     """Response do health check"""
     ok: bool = Field(default=True)
@@ -0,0 +1,107 @@
+"""
+Detector de risco compilado: pré-filtro por literais + confirmação por regex
+"""
+import re
+from typing import List, Tuple
+
+from models import RiskAssessment
+
+
+# Padrões para detecção de jailbreak/ataques
+DEFAULT_RISK_PATTERNS = [
+    r"ignore\s+previous\s+instructions",
+    r"act\s+as\s+(system|developer|root)",
+    r"begin_system_instructions",
+    r"developer\s+mode",
+    r"bypass\s+(safeguards|policies)",
+    r"jailbreak",
+    r"leak\s+(api|secret|key|password)",
+    r"credit\s+card\s+(number|details|cvv)",
+    r"cpf\s+completo",
+    r"senha\s+do\s+banco"
+]
+
+# Caracteres especiais de regex que encerram o prefixo literal de um padrão
+_REGEX_META = set("\\.^$*+?{}[]|()")
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Extrai o prefixo literal obrigatório de um padrão (vazio se não houver)"""
+    depth = 0
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+            continue
+        if char == "\\":
+            escaped = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            # Alternância no nível superior: nenhum literal é obrigatório
+            return ""
+
+    prefix = []
+    for char in pattern:
+        if char in _REGEX_META:
+            # Quantificador torna o caractere anterior opcional
+            if char in "?*{" and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+    return "".join(prefix).lower()
+
+
+class RiskScanner:
+    """Avalia risco de jailbreak/ataque com padrões compilados uma única vez"""
+
+    def __init__(self, patterns: List[str]):
+        self._compiled: Tuple[Tuple[str, str, "re.Pattern"], ...] = ()
+        self.load(patterns)
+
+    @property
+    def patterns(self) -> List[str]:
+        return [pattern for pattern, _, _ in self._compiled]
+
+    def load(self, patterns: List[str]):
+        """Compila e troca o conjunto de padrões (hot-reload sem reiniciar)"""
+        compiled = tuple(
+            (pattern, _literal_prefix(pattern), re.compile(pattern, re.IGNORECASE))
+            for pattern in patterns
+        )
+        # Troca atômica: avaliações em andamento seguem com o conjunto anterior
+        self._compiled = compiled
+
+    def scan(self, text: str) -> RiskAssessment:
+        """Avalia risco no texto (mesmos sinais e score do detector original)"""
+        score = 0
+        signals = []
+
+        text_lower = text.lower()
+
+        # Verifica padrões de risco: substring em C descarta a maioria antes da regex
+        for pattern, literal, regex in self._compiled:
+            if literal and literal not in text_lower:
+                continue
+            if regex.search(text_lower):
+                score += 25
+                signals.append(f"Padrão suspeito: {pattern}")
+
+        # Texto muito longo
+        if len(text) > 2000:
+            score += 15
+            signals.append("Texto excessivamente longo")
+
+        # Densidade anômala de palavras-chave
+        system_count = text_lower.count('system')
+        backtick_count = text.count('```')
+        if system_count > 3 or backtick_count > 5:
+            score += 10
+            signals.append("Densidade anômala de palavras-chave técnicas")
+
+        # Limita score a 100
+        score = min(score, 100)
+
+        return RiskAssessment(score=score, signals=signals)
@@ -0,0 +1,148 @@
+"""
+Agrupamento de interações similares: Jaccard exato e MinHash/LSH
+"""
+import random
+import zlib
+from typing import Dict, List, Set, Tuple, FrozenSet
+
+from models import Interaction
+
+
+# Primo de Mersenne para o hash universal (a*x + b) mod p
+_PRIME = (1 << 61) - 1
+
+
+def token_set(text: str) -> FrozenSet[str]:
+    """Conjunto de palavras (mesma tokenização do Jaccard original)"""
+    return frozenset(text.lower().split())
+
+
+def jaccard(words1: FrozenSet[str], words2: FrozenSet[str]) -> float:
+    """Similaridade Jaccard entre dois conjuntos de palavras"""
+    if not words1 and not words2:
+        return 1.0
+
+    union = len(words1 | words2)
+    return len(words1 & words2) / union if union else 0.0
+
+
+def group_exact(token_sets: List[FrozenSet[str]], threshold: float = 0.3) -> List[List[int]]:
+    """Agrupamento guloso original (O(n²) comparações, conjuntos pré-calculados)"""
+    groups = []
+    used: Set[int] = set()
+
+    for i, words in enumerate(token_sets):
+        if i in used:
+            continue
+
+        group = [i]
+        used.add(i)
+
+        for j in range(i + 1, len(token_sets)):
+            if j in used:
+                continue
+            if jaccard(words, token_sets[j]) >= threshold:
+                group.append(j)
+                used.add(j)
+
+        groups.append(group)
+
+    return groups
+
+
+class MinHashLSH:
+    """
+    Assinaturas MinHash + LSH por bandas para achar pares candidatos.
+
+    Com `rows_per_band` linhas por banda, um par com Jaccard s vira candidato
+    com probabilidade 1 - (1 - s^r)^b; r=2, b=32 cobre ~95% dos pares com s=0.3.
+    """
+
+    def __init__(self, num_perm: int = 64, rows_per_band: int = 2, verify: bool = True, seed: int = 1):
+        if num_perm % rows_per_band != 0:
+            raise ValueError("num_perm deve ser múltiplo de rows_per_band")
+        self.num_perm = num_perm
+        self.rows_per_band = rows_per_band
+        self.bands = num_perm // rows_per_band
+        # verify=True confirma candidatos com Jaccard exato; False usa a estimativa MinHash
+        self.verify = verify
+
+        rng = random.Random(seed)
+        self._coefficients = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)
+        ]
+        self._empty_signature = (_PRIME,) * num_perm
+        self._token_cache: Dict[str, Tuple[int, ...]] = {}
+
+    def _token_hashes(self, token: str) -> Tuple[int, ...]:
+        """Hashes de um token nas `num_perm` permutações (memoizado por token)"""
+        hashes = self._token_cache.get(token)
+        if hashes is None:
+            base = zlib.crc32(token.encode('utf-8'))
+            hashes = tuple((a * base + b) % _PRIME for a, b in self._coefficients)
+            if len(self._token_cache) < 100_000:
+                self._token_cache[token] = hashes
+        return hashes
+
+    def signature(self, words: FrozenSet[str]) -> Tuple[int, ...]:
+        """Assinatura MinHash: mínimo elemento a elemento dos hashes dos tokens"""
+        if not words:
+            return self._empty_signature
+        return tuple(map(min, zip(*(self._token_hashes(w) for w in words))))
+
+    def estimate(self, sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+        """Estimativa de Jaccard pela fração de posições iguais nas assinaturas"""
+        return sum(a == b for a, b in zip(sig1, sig2)) / self.num_perm
+
+    def group(self, token_sets: List[FrozenSet[str]], threshold: float = 0.3) -> List[List[int]]:
+        """Mesmo agrupamento guloso de group_exact, comparando só pares candidatos"""
+        signatures = [self.signature(words) for words in token_sets]
+
+        # Índice LSH: (banda, valores da banda) -> índices
+        buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        r = self.rows_per_band
+        for index, sig in enumerate(signatures):
+            for band in range(self.bands):
+                key = (band, sig[band * r:(band + 1) * r])
+                buckets.setdefault(key, []).append(index)
+
+        groups = []
+        used: Set[int] = set()
+
+        for i, sig in enumerate(signatures):
+            if i in used:
+                continue
+
+            group = [i]
+            used.add(i)
+
+            candidates: Set[int] = set()
+            for band in range(self.bands):
+                candidates.update(buckets[(band, sig[band * r:(band + 1) * r])])
+
+            for j in sorted(c for c in candidates if c > i and c not in used):
+                if self.verify:
+                    similarity = jaccard(token_sets[i], token_sets[j])
+                else:
+                    similarity = self.estimate(sig, signatures[j])
+                if similarity >= threshold:
+                    group.append(j)
+                    used.add(j)
+
+            groups.append(group)
+
+        return groups
+
+
+def group_interactions(
+    interactions: List[Interaction],
+    threshold: float = 0.3,
+    lsh: "MinHashLSH" = None
+) -> List[List[Interaction]]:
+    """Agrupa interações similares (Jaccard exato ou MinHash/LSH se `lsh` informado)"""
+    token_sets = [token_set(i.text) for i in interactions]
+    if lsh is None:
+        index_groups = group_exact(token_sets, threshold)
+    else:
+        index_groups = lsh.group(token_sets, threshold)
+    return [[interactions[index] for index in group] for group in index_groups]
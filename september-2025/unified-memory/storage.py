@@ -0,0 +1,360 @@
+"""
+Backends de armazenamento da memória: snapshot único, shards por cliente e SQLite
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, List, Optional, Any, Tuple
+
+from models import MemoryData, ClientData
+from memory_log import MemoryLog
+
+
+class MemoryStorage:
+    """Interface dos backends de armazenamento (um ClientData por cliente)"""
+
+    # True se o backend mantém todos os clientes em memória (tirar do cache não libera RAM)
+    resident = False
+
+    def list_clients(self) -> List[str]:
+        """Lista IDs de clientes sem carregar suas interações"""
+        raise NotImplementedError
+
+    def load_client(self, client_id: str) -> Optional[ClientData]:
+        """Carrega um cliente (ou None se não existir)"""
+        raise NotImplementedError
+
+    def add_client(self, client_id: str, client: ClientData):
+        """Registra um cliente novo (persistido na próxima mutação)"""
+        raise NotImplementedError
+
+    def remove_client(self, client_id: str):
+        """Remove um cliente do índice (arquivos são apagados na persistência)"""
+        raise NotImplementedError
+
+    def record(self, op: str, client_id: str, client: Optional[ClientData], **payload: Any):
+        """Persiste uma mutação do cliente"""
+        raise NotImplementedError
+
+    def record_many(self, records: List[Tuple[str, str, Optional[ClientData], Dict[str, Any]]]):
+        """Persiste várias mutações (op, client_id, cliente, payload) de uma vez"""
+        for op, client_id, client, payload in records:
+            self.record(op, client_id, client, **payload)
+
+    def prepare_write(self, updates: Dict[str, Optional[ClientData]]) -> Any:
+        """
+        Serializa clientes modificados para escrita em lote (write-behind).
+        Roda no event loop; None indica cliente excluído.
+        """
+        return {
+            client_id: client.model_dump() if client is not None else None
+            for client_id, client in updates.items()
+        }
+
+    def commit_write(self, payload: Any):
+        """Grava o lote preparado em prepare_write (só I/O; roda fora do event loop)"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Grava pendências (snapshot, compactação)"""
+        pass
+
+
+class SnapshotStorage(MemoryStorage):
+    """Arquivo JSON único, carregado por inteiro, com log de mutações opcional"""
+
+    resident = True
+
+    def __init__(self, memory_file: str = "memory.json", persistence: str = "wal", snapshot_every: int = 1000):
+        # Persistência: "wal" (log append-only + snapshots periódicos) ou "json" (reescrita completa)
+        if persistence not in ("wal", "json"):
+            raise ValueError(f"Modo de persistência inválido: {persistence}")
+        self.memory_file = memory_file
+        self.persistence = persistence
+        self.snapshot_every = snapshot_every
+        self.memory_log = MemoryLog(f"{memory_file}.wal") if persistence == "wal" else None
+
+        self.memory_data = self._load_memory()
+
+    def _load_memory(self) -> MemoryData:
+        """Carrega snapshot do arquivo JSON e reaplica o log de mutações"""
+        memory_data = MemoryData()
+        if os.path.exists(self.memory_file):
+            try:
+                with open(self.memory_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    memory_data = MemoryData(**data)
+            except Exception as e:
+                print(f"Erro ao carregar memória: {e}")
+                return MemoryData()
+
+        if self.memory_log is not None:
+            self.memory_log.replay(memory_data)
+
+        return memory_data
+
+    def _save_memory(self):
+        """Salva snapshot completo da memória no arquivo JSON"""
+        try:
+            tmp_file = f"{self.memory_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._snapshot(), f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.memory_file)
+        except Exception as e:
+            print(f"Erro ao salvar memória: {e}")
+            return
+
+        # Snapshot contém tudo o que estava no log
+        if self.memory_log is not None:
+            self.memory_log.truncate()
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """Memória serializada, marcada com o último registro do log que ela contém"""
+        if self.memory_log is not None:
+            self.memory_data.wal_seq = self.memory_log.seq
+        return self.memory_data.model_dump()
+
+    def list_clients(self) -> List[str]:
+        return list(self.memory_data.clients.keys())
+
+    def load_client(self, client_id: str) -> Optional[ClientData]:
+        return self.memory_data.clients.get(client_id)
+
+    def add_client(self, client_id: str, client: ClientData):
+        self.memory_data.clients[client_id] = client
+
+    def remove_client(self, client_id: str):
+        self.memory_data.clients.pop(client_id, None)
+
+    def record(self, op: str, client_id: str, client: Optional[ClientData], **payload: Any):
+        self.record_many([(op, client_id, client, payload)])
+
+    def record_many(self, records: List[Tuple[str, str, Optional[ClientData], Dict[str, Any]]]):
+        if self.memory_log is None:
+            self._save_memory()
+            return
+
+        # Um único append (e um fsync) para todas as mutações
+        lines = []
+        for op, client_id, client, payload in records:
+            if op == "client":
+                payload = {"data": client.model_dump()}
+            lines.append({"op": op, "client_id": client_id, **payload})
+        try:
+            self.memory_log.append_many(lines)
+        except Exception as e:
+            print(f"Erro ao gravar log de memória: {e}")
+            self._save_memory()
+            return
+
+        # Compactação periódica: snapshot + truncamento do log
+        if self.memory_log.records >= self.snapshot_every:
+            self._save_memory()
+
+    def prepare_write(self, updates: Dict[str, Optional[ClientData]]) -> Any:
+        # Sem log, ou log cheio: snapshot completo (serializado aqui, gravado fora do loop)
+        if self.memory_log is None or self.memory_log.records + len(updates) >= self.snapshot_every:
+            return ("snapshot", self._snapshot())
+
+        records = []
+        for client_id, client in updates.items():
+            if client is None:
+                records.append({"op": "delete_client", "client_id": client_id})
+            else:
+                records.append({"op": "client", "client_id": client_id, "data": client.model_dump()})
+        return ("records", records)
+
+    def commit_write(self, payload: Any):
+        kind, data = payload
+        if kind == "records":
+            try:
+                self.memory_log.append_many(data)
+                return
+            except Exception as e:
+                print(f"Erro ao gravar log de memória: {e}")
+                return
+
+        try:
+            tmp_file = f"{self.memory_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.memory_file)
+        except Exception as e:
+            print(f"Erro ao salvar memória: {e}")
+            return
+
+        if self.memory_log is not None:
+            self.memory_log.truncate()
+
+    def flush(self):
+        """Força snapshot completo e trunca o log de mutações"""
+        self._save_memory()
+
+
+class ShardedStorage(MemoryStorage):
+    """Um arquivo JSON por cliente (nome = hash do client_id) e índice append-only"""
+
+    def __init__(self, directory: str = "memory_shards"):
+        self.directory = directory
+        self.index_file = os.path.join(directory, "index.log")
+        os.makedirs(directory, exist_ok=True)
+        self._client_ids = self._load_index()
+        # Linhas do índice ainda não gravadas (vão junto com a próxima gravação de shards)
+        self._index_pending: List[str] = []
+
+    def _load_index(self) -> Dict[str, bool]:
+        """Lê o índice de clientes (+id / -id por linha) e o reescreve compactado"""
+        client_ids = {}
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if not line:
+                        continue
+                    if line[0] == "+":
+                        client_ids[line[1:]] = True
+                    elif line[0] == "-":
+                        client_ids.pop(line[1:], None)
+
+            tmp_file = f"{self.index_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.writelines(f"+{client_id}\n" for client_id in client_ids)
+            os.replace(tmp_file, self.index_file)
+
+        return client_ids
+
+    def _append_index(self, lines: List[str]):
+        if not lines:
+            return
+        with open(self.index_file, 'a', encoding='utf-8') as f:
+            f.writelines(line + "\n" for line in lines)
+
+    def _take_index(self) -> List[str]:
+        lines = self._index_pending
+        self._index_pending = []
+        return lines
+
+    def _shard_path(self, client_id: str) -> str:
+        digest = hashlib.sha1(client_id.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def list_clients(self) -> List[str]:
+        return list(self._client_ids)
+
+    def load_client(self, client_id: str) -> Optional[ClientData]:
+        path = self._shard_path(client_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return ClientData(**json.load(f))
+        except Exception as e:
+            print(f"Erro ao carregar shard de {client_id}: {e}")
+            return None
+
+    def add_client(self, client_id: str, client: ClientData):
+        if client_id not in self._client_ids:
+            self._client_ids[client_id] = True
+            self._index_pending.append(f"+{client_id}")
+
+    def remove_client(self, client_id: str):
+        if client_id in self._client_ids:
+            del self._client_ids[client_id]
+            self._index_pending.append(f"-{client_id}")
+
+    def _write_shard(self, client_id: str, data: Optional[Dict[str, Any]]):
+        """Reescreve (ou apaga, se data=None) apenas o shard do cliente"""
+        path = self._shard_path(client_id)
+        try:
+            if data is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_file = f"{path}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, path)
+        except Exception as e:
+            print(f"Erro ao salvar shard de {client_id}: {e}")
+
+    def record(self, op: str, client_id: str, client: Optional[ClientData], **payload: Any):
+        self._append_index(self._take_index())
+        if op == "delete_client":
+            self._write_shard(client_id, None)
+        else:
+            self._write_shard(client_id, client.model_dump())
+
+    def prepare_write(self, updates: Dict[str, Optional[ClientData]]) -> Any:
+        # O índice pendente é tirado no loop e gravado junto com o lote, na thread
+        return self._take_index(), super().prepare_write(updates)
+
+    def commit_write(self, payload: Any):
+        index_lines, shards = payload
+        self._append_index(index_lines)
+        for client_id, data in shards.items():
+            self._write_shard(client_id, data)
+
+    def flush(self):
+        self._append_index(self._take_index())
+
+
+class SQLiteStorage(MemoryStorage):
+    """Uma linha por cliente em um banco SQLite embarcado"""
+
+    def __init__(self, db_file: str = "memory.db"):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS clients (client_id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def list_clients(self) -> List[str]:
+        rows = self.conn.execute("SELECT client_id FROM clients ORDER BY rowid").fetchall()
+        return [row[0] for row in rows]
+
+    def load_client(self, client_id: str) -> Optional[ClientData]:
+        row = self.conn.execute(
+            "SELECT data FROM clients WHERE client_id = ?", (client_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return ClientData(**json.loads(row[0]))
+
+    def add_client(self, client_id: str, client: ClientData):
+        pass
+
+    def remove_client(self, client_id: str):
+        pass
+
+    def record(self, op: str, client_id: str, client: Optional[ClientData], **payload: Any):
+        self.record_many([(op, client_id, client, payload)])
+
+    def record_many(self, records: List[Tuple[str, str, Optional[ClientData], Dict[str, Any]]]):
+        # Estado final de cada cliente numa única transação
+        self.commit_write({
+            client_id: client.model_dump() if op != "delete_client" else None
+            for op, client_id, client, _ in records
+        })
+
+    def commit_write(self, payload: Any):
+        # Um único commit para o lote inteiro
+        try:
+            with self.conn:
+                for client_id, data in payload.items():
+                    if data is None:
+                        self.conn.execute("DELETE FROM clients WHERE client_id = ?", (client_id,))
+                    else:
+                        self.conn.execute(
+                            "INSERT INTO clients (client_id, data) VALUES (?, ?) "
+                            "ON CONFLICT(client_id) DO UPDATE SET data = excluded.data",
+                            (client_id, json.dumps(data, ensure_ascii=False))
+                        )
+        except Exception as e:
+            print(f"Erro ao salvar clientes no SQLite: {e}")
+
+    def flush(self):
+        self.conn.commit()
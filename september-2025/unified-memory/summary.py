@@ -0,0 +1,97 @@
+"""
+Resumo incremental do estado do cliente: contagem de palavras numa janela deslizante
+"""
+import heapq
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+# Palavras muito comuns, ignoradas nos temas do resumo
+STOP_WORDS = frozenset({
+    "o", "a", "de", "do", "da", "em", "um", "uma", "para", "com", "não", "que", "se", "por",
+    "mais", "como", "mas", "foi", "ao", "ele", "das", "tem", "à", "seu", "sua", "ou", "ser",
+    "quando", "muito", "há", "nos", "já", "está", "eu", "também", "só", "pelo", "pela", "até",
+    "isso", "ela", "entre", "era", "depois", "sem", "mesmo", "aos", "ter", "seus", "suas",
+    "numa", "pelos", "pelas", "esse", "esses", "essa", "essas", "dele", "deles", "desta",
+    "deste", "nesta", "neste", "nessa", "nesse", "nuns", "umas",
+})
+
+# Interações consideradas no resumo (as últimas da lista do cliente)
+SUMMARY_WINDOW = 10
+
+EMPTY_SUMMARY = "Nenhuma interação recente disponível."
+
+
+class SummaryWindow:
+    """
+    Contagem de palavras das últimas `size` interações de um cliente, mantida
+    incrementalmente: o evento que entra soma suas palavras e o que sai da
+    janela subtrai as dele.
+
+    Eventos quarentenados e sintéticos (canal "memory") ocupam posição na
+    janela mas não contam. O desempate entre palavras com a mesma contagem
+    é a primeira ocorrência na janela, como em Counter(...).most_common().
+    """
+
+    def __init__(self, size: int = SUMMARY_WINDOW):
+        self.size = size
+        # (sequência, canal, palavras; None = evento que não conta)
+        self._events: Deque[Tuple[int, str, Optional[List[str]]]] = deque()
+        self._counts: Counter = Counter()
+        # palavra -> (sequência, posição) da primeira ocorrência em cada evento da janela
+        self._first_seen: Dict[str, Deque[Tuple[int, int]]] = {}
+        self._seq = 0
+
+    def reset(self, events: List[Tuple[str, str, bool]]):
+        """Recalcula a janela a partir de (canal, texto, quarentenado) em ordem"""
+        self._events.clear()
+        self._counts.clear()
+        self._first_seen.clear()
+        for channel, text, quarantined in events[-self.size:]:
+            self.push(channel, text, quarantined)
+
+    def push(self, channel: str, text: str, quarantined: bool = False):
+        """Acrescenta o evento mais recente, descartando o mais antigo se a janela encheu"""
+        self._seq += 1
+        words = None
+        if not quarantined and channel != "memory":
+            words = text.lower().split()
+            self._counts.update(words)
+            seen = set()
+            for position, word in enumerate(words):
+                if word not in seen:
+                    seen.add(word)
+                    self._first_seen.setdefault(word, deque()).append((self._seq, position))
+        self._events.append((self._seq, channel, words))
+
+        if len(self._events) > self.size:
+            self._evict()
+
+    def _evict(self):
+        _, _, words = self._events.popleft()
+        if not words:
+            return
+        for word in words:
+            remaining = self._counts[word] - 1
+            if remaining:
+                self._counts[word] = remaining
+            else:
+                del self._counts[word]
+        # O evento mais antigo é sempre a primeira ocorrência registrada
+        for word in set(words):
+            first_seen = self._first_seen[word]
+            first_seen.popleft()
+            if not first_seen:
+                del self._first_seen[word]
+
+    def render(self) -> str:
+        """Texto do resumo: canais e temas mais frequentes da janela"""
+        channels = list(dict.fromkeys(channel for _, channel, words in self._events if words is not None))
+        if not channels:
+            return EMPTY_SUMMARY
+
+        counts, first_seen = self._counts, self._first_seen
+        top_words = heapq.nsmallest(10, counts, key=lambda word: (-counts[word], first_seen[word][0]))
+        relevant_words = [word for word in top_words if word not in STOP_WORDS and len(word) > 2]
+
+        return f"Cliente interagiu via {', '.join(channels)} sobre: {', '.join(relevant_words[:5])}."
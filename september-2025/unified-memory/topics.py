@@ -0,0 +1,134 @@
+"""
+Classificador de tópicos compilado: uma varredura por texto e lotes vetorizados com NumPy
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+# Palavras-chave por tópico (ordem de exibição nas sugestões)
+TOPIC_KEYWORDS = {
+    "parcelamento": ["parcelar", "parcela", "parcelamento", "dividir", "prestação"],
+    "endereço": ["endereço", "endereco", "mudança", "mudar", "atualizar", "rua", "cep"],
+    "cartão": ["cartão", "cartao", "card", "fatura", "conta"],
+    "pagamento": ["pagar", "pagamento", "boleto", "pix", "transferência"],
+    "cancelamento": ["cancelar", "cancelamento", "encerrar", "desativar"],
+    "dúvidas": ["dúvida", "duvida", "informação", "saber", "como", "quando"],
+    "problema": ["problema", "erro", "não", "nao", "conseguir", "dificuldade"]
+}
+
+# Intenções da mensagem, na ordem em que a resposta contextual as testa
+INTENT_KEYWORDS = {
+    "agradecimento": ["obrigado", "obrigada", "valeu", "agradeço"],
+    "despedida": ["tchau", "até", "falou", "bye"],
+    "pergunta": ["como", "quando", "onde", "qual", "que", "posso", "consigo"],
+    "problema": ["problema", "erro", "não consegui", "dificuldade", "ajuda"],
+    "solicitação": ["quero", "preciso", "gostaria", "solicitar"]
+}
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex com prefixos comuns fatorados (casa a palavra-chave mais longa)"""
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Uma palavra-chave termina aqui: a continuação é opcional (gulosa)
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+class TopicClassifier:
+    """
+    Encontra todas as palavras-chave de tópicos e intenções em uma única
+    varredura do texto, com a mesma semântica de `keyword in text`.
+
+    As palavras-chave viram uma regex em forma de trie dentro de um lookahead,
+    que devolve a mais longa que começa em cada posição; as mais curtas na
+    mesma posição são prefixos dela e vêm de uma tabela pré-calculada.
+    Para lotes, os textos viram uma matriz esparsa (COO) documento × palavra-chave
+    multiplicada pela matriz de incidência palavra-chave × tópico.
+    """
+
+    def __init__(
+        self,
+        topics: Optional[Dict[str, List[str]]] = None,
+        intents: Optional[Dict[str, List[str]]] = None,
+        cache_size: int = 4096
+    ):
+        topics = topics or TOPIC_KEYWORDS
+        intents = intents or INTENT_KEYWORDS
+        self.topic_names = list(topics)
+        self._topics = [(name, frozenset(keywords)) for name, keywords in topics.items()]
+        self._intents = [(name, frozenset(keywords)) for name, keywords in intents.items()]
+
+        self.vocabulary = sorted({kw for table in (topics, intents) for kws in table.values() for kw in kws})
+        index = {keyword: i for i, keyword in enumerate(self.vocabulary)}
+        self._pattern = re.compile("(?=(" + _trie_pattern(self.vocabulary) + "))")
+        self._implied: Dict[str, FrozenSet[str]] = {
+            kw: frozenset(other for other in self.vocabulary if kw.startswith(other))
+            for kw in self.vocabulary
+        }
+        self._implied_ids: Dict[str, List[int]] = {
+            kw: [index[other] for other in implied] for kw, implied in self._implied.items()
+        }
+
+        # Os mesmos eventos de outros canais entram em várias sugestões seguidas
+        self.match = lru_cache(maxsize=cache_size)(self._scan)
+
+        # Incidência palavra-chave × tópico
+        self._incidence = np.zeros((len(self.vocabulary), len(self.topic_names)), dtype=np.int32)
+        for column, (_, keywords) in enumerate(self._topics):
+            for keyword in keywords:
+                self._incidence[index[keyword], column] = 1
+
+    def _scan(self, text: str) -> FrozenSet[str]:
+        """Palavras-chave contidas no texto (sem diferenciar maiúsculas); use `match`"""
+        found = set()
+        for longest in set(self._pattern.findall(text.lower())):
+            found |= self._implied[longest]
+        return frozenset(found)
+
+    def topics(self, hits: FrozenSet[str]) -> List[str]:
+        """Tópicos com alguma palavra-chave encontrada, na ordem da tabela"""
+        return [name for name, keywords in self._topics if not hits.isdisjoint(keywords)]
+
+    def intents(self, hits: FrozenSet[str]) -> List[str]:
+        """Intenções com alguma palavra-chave encontrada, na ordem de prioridade"""
+        return [name for name, keywords in self._intents if not hits.isdisjoint(keywords)]
+
+    def classify(self, texts: Iterable[str], hits: FrozenSet[str] = frozenset()) -> List[str]:
+        """Tópicos do conjunto de textos (somados a `hits` já encontrados)"""
+        found = set(hits)
+        for text in texts:
+            found |= self.match(text)
+        return self.topics(frozenset(found))
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Ocorrências de palavras-chave por tópico de cada texto: matriz
+        (textos × tópicos) calculada como bag-of-words esparso × incidência.
+        """
+        rows: List[int] = []
+        columns: List[int] = []
+        for row, text in enumerate(texts):
+            for longest in self._pattern.findall(text.lower()):
+                ids = self._implied_ids[longest]
+                rows.extend([row] * len(ids))
+                columns.extend(ids)
+
+        scores = np.zeros((len(texts), len(self.topic_names)), dtype=np.int32)
+        if rows:
+            np.add.at(scores, np.asarray(rows), self._incidence[np.asarray(columns)])
+        return scores